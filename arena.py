@@ -0,0 +1,317 @@
+"""Arena mode: many snakes on one board.
+
+All snakes share one grid that maps each cell to the id of the snake on it
+(0 = empty), plus a grid of fruit values. A tick is resolved in batch: every
+snake picks its next head, tails that move out this tick are released, then
+each head looks up its target cell once. An owned cell is a body hit (own or
+another snake's); two heads claiming the same free cell is a head-on crash
+and both die. Nothing scans another snake's body, so a tick costs O(snakes)
+whatever the board size; a dead snake's cells are released once, when it
+dies.
+
+Like ``snake_core`` this is headless: time comes from an injected clock and
+randomness from a per-arena ``random.Random``.
+"""
+import random
+from array import array
+from collections import deque
+from typing import Callable
+
+from snake_core import DIRECTIONS, FPS, FRUIT_TYPES, FRUIT_WEIGHTS, Clock, FreeCellIndex, Point, monotonic_ms
+
+ARENA_GRID_SIZE = 128
+MAX_SNAKES = 0xFFFF - 1  # ids are stored as unsigned shorts, 0 is empty
+START_LENGTH = 3
+
+
+class ArenaSnake:
+    def __init__(self, sid: int, body: list[Point], direction: Point, controller: "Controller | None" = None):
+        self.id = sid
+        self.body: deque[Point] = deque(body)  # tail first, head last
+        self.direction = direction
+        self.pending_direction = direction
+        self.growth_pending = 0
+        self.score = 0
+        self.alive = True
+        self.moves = 0
+        # Called once per tick before moves are resolved; steers the snake
+        self.controller = controller
+        self.target = -1  # fruit slot a bot is heading for
+
+    @property
+    def head(self) -> Point:
+        return self.body[-1]
+
+    def __len__(self) -> int:
+        return len(self.body)
+
+    def set_direction(self, dx: int, dy: int):
+        # Prevent reversing into itself
+        if len(self.body) > 1 and dx == -self.direction.x and dy == -self.direction.y:
+            return
+        self.pending_direction = Point(dx, dy)
+
+
+Controller = Callable[["Arena", ArenaSnake], None]
+
+
+# ----------------------------
+# Controllers
+# ----------------------------
+def greedy_bot(arena: "Arena", snake: ArenaSnake):
+    """Head for an assigned fruit, never straight into an occupied cell.
+
+    Looks at three neighbour cells and nothing else, so it is O(1) per snake.
+    """
+    grid = arena.grid_size
+    slots = arena.fruit_slots
+    if snake.target < 0 or slots[snake.target] < 0 or arena.rng.random() < 0.01:
+        snake.target = arena.rng.randrange(len(slots))
+    head = snake.body[-1]
+    goal = slots[snake.target]
+    # No fruit left anywhere: just keep out of trouble
+    gx, gy = (goal % grid, goal // grid) if goal >= 0 else (head.x, head.y)
+    d = snake.direction
+    best = None
+    best_dist = grid * 2 + 1
+    # Straight first so ties keep the current heading
+    for dx, dy in ((d.x, d.y), (d.y, -d.x), (-d.y, d.x)):
+        x = (head.x + dx) % grid
+        y = (head.y + dy) % grid
+        if arena.owner[y * grid + x]:
+            continue
+        # Wrap-aware Manhattan distance
+        ddx = abs(x - gx)
+        ddy = abs(y - gy)
+        dist = min(ddx, grid - ddx) + min(ddy, grid - ddy)
+        if dist < best_dist:
+            best, best_dist = (dx, dy), dist
+    if best is not None:
+        snake.set_direction(*best)
+
+
+class ScriptedController:
+    """Replays recorded (tick, direction index) inputs, e.g. a ghost of a past run."""
+
+    def __init__(self, inputs: list[tuple[int, int]]):
+        self.inputs = inputs
+        self._pos = 0
+
+    def __call__(self, arena: "Arena", snake: ArenaSnake):
+        inputs = self.inputs
+        while self._pos < len(inputs) and inputs[self._pos][0] <= snake.moves:
+            snake.set_direction(*DIRECTIONS[inputs[self._pos][1]])
+            self._pos += 1
+
+
+# ----------------------------
+# Arena
+# ----------------------------
+class Arena:
+    def __init__(self, n_snakes: int, grid_size: int = ARENA_GRID_SIZE, clock: Clock | None = None,
+                 rng: random.Random | None = None, seed: int | None = None, n_fruits: int | None = None,
+                 player: bool = True, respawn: bool = True):
+        if not 0 < n_snakes <= MAX_SNAKES:
+            raise ValueError(f"arena holds 1 to {MAX_SNAKES} snakes")
+        self.clock: Clock = clock if clock is not None else monotonic_ms
+        if rng is None and seed is None:
+            seed = random.getrandbits(64)
+        self.seed = seed
+        self.rng = rng if rng is not None else random.Random(seed)
+        self.grid_size = grid_size
+        n_cells = grid_size * grid_size
+        # Cell -> snake id (0 = empty), fruit points per cell (0 = none)
+        self.owner = array("H", bytes(2 * n_cells))
+        self.fruit = bytearray(n_cells)
+        self._fruit_slot: dict[int, int] = {}  # cell index -> slot
+        self.free_cells = FreeCellIndex(n_cells)
+        self.snakes: list[ArenaSnake] = []
+        # The player is snake 1 and never respawns; bots come back after dying
+        self.player: ArenaSnake | None = None
+        self.respawn = respawn
+        self.player_inputs: list[tuple[int, int]] = []  # (tick, direction index)
+        self.ticks = 0
+        self.game_over = False
+        self.won = False
+        for sid in range(1, n_snakes + 1):
+            controller = None if player and sid == 1 else greedy_bot
+            snake = ArenaSnake(sid, [], Point(1, 0), controller)
+            self.snakes.append(snake)
+            if not self._place(snake):
+                raise ValueError("board too small for that many snakes")
+        if player:
+            self.player = self.snakes[0]
+        # A fixed set of fruit slots (cell index, -1 while empty); eating one
+        # refills the same slot so bots can track targets by slot
+        self.fruit_slots = [-1] * (n_fruits if n_fruits is not None else max(1, n_snakes))
+        for slot in range(len(self.fruit_slots)):
+            self._spawn_fruit(slot)
+
+        # timing for movement (fixed timestep, same scheme as Game.update)
+        self.step_interval = int(1000 / FPS)
+        self.last_step_ms = self.clock()
+        self.max_steps_per_update = 8
+
+    # ----------------------------
+    # Placement
+    # ----------------------------
+    def _claim(self, idx: int, sid: int):
+        self.owner[idx] = sid
+        self.free_cells.remove(idx)
+
+    def _release(self, idx: int):
+        self.owner[idx] = 0
+        self.free_cells.add(idx)
+
+    def _place(self, snake: ArenaSnake, tries: int = 32) -> bool:
+        # Random free straight run for the starting body
+        grid = self.grid_size
+        owner = self.owner
+        for _ in range(tries):
+            idx = self.free_cells.sample(self.rng)
+            if idx is None:
+                return False
+            dx, dy = self.rng.choice(DIRECTIONS)
+            hx, hy = idx % grid, idx // grid
+            cells = [Point((hx - dx * i) % grid, (hy - dy * i) % grid) for i in range(START_LENGTH - 1, -1, -1)]
+            if any(owner[c.y * grid + c.x] or self.fruit[c.y * grid + c.x] for c in cells):
+                continue
+            for c in cells:
+                self._claim(c.y * grid + c.x, snake.id)
+            snake.body = deque(cells)
+            snake.direction = snake.pending_direction = Point(dx, dy)
+            snake.growth_pending = 0
+            snake.alive = True
+            return True
+        return False
+
+    def _spawn_fruit(self, slot: int):
+        # Fruit sits on free cells only; a full board leaves the slot empty
+        for _ in range(8):
+            idx = self.free_cells.sample(self.rng)
+            if idx is None:
+                break
+            if not self.fruit[idx]:
+                choice = self.rng.choices(FRUIT_TYPES, weights=FRUIT_WEIGHTS, k=1)[0]
+                self.fruit[idx] = choice["points"]
+                self.fruit_slots[slot] = idx
+                self._fruit_slot[idx] = slot
+                return
+        self.fruit_slots[slot] = -1
+
+    def _kill(self, snake: ArenaSnake):
+        # Cells go back to the board; the body itself is kept until a
+        # respawn so the camera still has a head to look at
+        snake.alive = False
+        grid = self.grid_size
+        for c in snake.body:
+            self._release(c.y * grid + c.x)
+
+    # ----------------------------
+    # Input (player)
+    # ----------------------------
+    @property
+    def snake(self) -> ArenaSnake:
+        """The snake the camera follows: the player, else the first bot."""
+        return self.player if self.player is not None else self.snakes[0]
+
+    @property
+    def score(self) -> int:
+        return self.player.score if self.player is not None else 0
+
+    def steer(self, dx: int, dy: int):
+        if self.game_over or self.player is None:
+            return
+        self.player_inputs.append((self.player.moves, DIRECTIONS.index((dx, dy))))
+        self.player.set_direction(dx, dy)
+
+    def activate_turbo(self, now_ms: int) -> bool:
+        # No TURBO in the arena
+        return False
+
+    def alive_count(self) -> int:
+        return sum(1 for s in self.snakes if s.alive)
+
+    # ----------------------------
+    # Simulation
+    # ----------------------------
+    def update(self, now_ms: int) -> int:
+        """Run every tick that has come due by ``now_ms`` (see ``Game.update``)."""
+        steps = 0
+        while not self.game_over and now_ms - self.last_step_ms >= self.step_interval:
+            if steps == self.max_steps_per_update:
+                self.last_step_ms = now_ms
+                break
+            self.last_step_ms += self.step_interval
+            self.step()
+            steps += 1
+        return steps
+
+    def step_progress(self, now_ms: int) -> float:
+        return min(1.0, max(0.0, (now_ms - self.last_step_ms) / self.step_interval))
+
+    def step(self):
+        """Advance every snake by one tick and resolve all collisions."""
+        if self.game_over:
+            return
+        grid = self.grid_size
+        owner = self.owner
+        if self.respawn:
+            # Bots that died last tick come back (if there is room)
+            for s in self.snakes:
+                if not s.alive and s is not self.player:
+                    self._place(s)
+        alive = [s for s in self.snakes if s.alive]
+        if not alive:
+            self.game_over = True
+            return
+
+        for s in alive:
+            if s.controller is not None:
+                s.controller(self, s)
+
+        # Next head cell for everyone, then release the tails that move on
+        # (a head may follow a tail into the cell it just left)
+        targets = []
+        for s in alive:
+            d = s.direction = s.pending_direction
+            head = s.body[-1]
+            targets.append(((head.y + d.y) % grid) * grid + (head.x + d.x) % grid)
+        for s in alive:
+            if s.growth_pending > 0:
+                s.growth_pending -= 1
+            else:
+                tail = s.body.popleft()
+                self._release(tail.y * grid + tail.x)
+
+        # One lookup per head: owned cell = body hit, shared claim = head-on
+        claims: dict[int, int] = {}
+        crashed = set()
+        for i, idx in enumerate(targets):
+            if owner[idx]:
+                crashed.add(i)
+                continue
+            first = claims.setdefault(idx, i)
+            if first != i:
+                crashed.add(i)
+                crashed.add(first)
+
+        for i, s in enumerate(alive):
+            s.moves += 1
+            if i in crashed:
+                continue
+            idx = targets[i]
+            self._claim(idx, s.id)
+            s.body.append(Point(idx % grid, idx // grid))
+            points = self.fruit[idx]
+            if points:
+                self.fruit[idx] = 0
+                s.score += points
+                s.growth_pending += points
+                self._spawn_fruit(self._fruit_slot.pop(idx))
+        for i in crashed:
+            self._kill(alive[i])
+        self.ticks += 1
+
+        if self.player is not None and not self.player.alive:
+            self.game_over = True
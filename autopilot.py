@@ -0,0 +1,353 @@
+"""Autopilot: steers a ``Game`` from inside its step loop.
+
+Each tick the pilot picks the next cell for the head:
+
+* a wrap-aware A* path to the fruit (or the nearest cell of the Mega Fruit
+  while it is up), accepted only if, after following it, the head can still
+  reach the tail (so eating never seals the snake in);
+* otherwise it follows its own tail, which is always a safe way to wait;
+* once the snake fills a large part of the board, it rides a Hamiltonian
+  cycle, which can never trap it.
+
+Search state (cost and parent) lives in dicts holding only the cells a
+search touches, so a pilot costs the same on any board size. A path is kept and
+walked one cell per tick for as long as the head follows it and the target
+stays put, so a replan only happens when a fruit is eaten or something
+unexpected happens. Each tick expands at most ``max_nodes`` cells in total
+and, with ``budget_ms`` set, stops searching once that much wall time has
+gone; when a search runs out of budget the pilot makes a cheap safe move and
+tries again next tick. The node cap alone keeps a seeded game reproducible on
+any machine (tournaments, benchmarks); the time budget is for live play.
+
+Attach with ``game.controller = Autopilot(game.grid_size)``.
+"""
+import heapq
+import time
+from array import array
+from itertools import islice
+
+from snake_core import Game, Snake
+
+CYCLE_FILL = 0.5  # switch to the Hamiltonian cycle past this share of the board
+TICK_BUDGET_MS = 2.0  # search time per tick in live play
+CLOCK_EVERY = 64  # expansions between wall-clock checks
+
+
+class Autopilot:
+    def __init__(self, grid_size: int, max_nodes: int = 5000, cycle_fill: float = CYCLE_FILL,
+                 budget_ms: float | None = None):
+        self.grid_size = grid_size
+        self.max_nodes = max_nodes
+        self.budget_ms = budget_ms
+        self.cycle_fill = cycle_fill
+        # Parents from the last search, for unwinding its path
+        self._parent: dict[int, int] = {}
+        # Planned cells still ahead of the head (next cell last)
+        self._path: list[int] = []
+        self._path_head = -1  # head the plan expects to see next tick
+        self._path_goal: tuple[int, ...] = ()
+        # Hamiltonian cycle: successor and position of every cell, built on
+        # first use; once the body lies along it the pilot stays on it
+        self._cycle_next: array | None = None
+        self._cycle_pos: array | None = None
+        self._on_cycle = False
+        self._last_score = 0
+        self._stalled = 0  # ticks since the last fruit
+        self._budget = 0
+        self._deadline: float | None = None
+        self._exhausted = False  # last search stopped on the budget
+        # Stats
+        self.searches = 0
+        self.nodes = 0
+
+    def __call__(self, game: Game):
+        snake = game.snake
+        grid = self.grid_size
+        self._budget = self.max_nodes
+        if self.budget_ms is not None:
+            self._deadline = time.perf_counter() + self.budget_ms / 1000.0
+        if game.score != self._last_score:
+            self._last_score = game.score
+            self._stalled = 0
+        else:
+            self._stalled += 1
+        head = snake.head
+        head_idx = head.y * grid + head.x
+        nxt = self._choose(game, snake, head_idx)
+        if nxt is None:
+            return  # boxed in: keep going and let the game end
+        dx = (nxt % grid - head.x + 1) % grid - 1
+        dy = (nxt // grid - head.y + 1) % grid - 1
+        if (dx, dy) != snake.direction:
+            game.steer(dx, dy)
+
+    # ----------------------------
+    # Decision
+    # ----------------------------
+    def _choose(self, game: Game, snake: Snake, head_idx: int) -> int | None:
+        grid = self.grid_size
+        n_cells = grid * grid
+        # Late game, or going round in circles behind the tail: take the
+        # cycle as soon as the body lies along it
+        if self._on_cycle or (grid % 2 == 0
+                              and (len(snake.body) >= self.cycle_fill * n_cells or self._stalled >= n_cells)
+                              and self._aligned(snake, head_idx)):
+            nxt = self._cycle_step(snake, head_idx)
+            self._on_cycle = nxt is not None
+            if nxt is not None:
+                return nxt
+
+        goals = self._goals(game)
+        # Keep walking the current plan while it still applies
+        path = self._path
+        if path and self._path_head == head_idx and self._path_goal == goals:
+            nxt = path[-1]
+            if self._passable(snake, nxt):
+                path.pop()
+                self._path_head = nxt
+                return nxt
+        self._path = []
+
+        if goals:
+            found = self._search(snake, head_idx, goals)
+            gain = game.special_points if game.special_active else game.fruit_points
+            if found and self._safe_after(snake, found, gain):
+                found.reverse()
+                nxt = found.pop()
+                self._path, self._path_head, self._path_goal = found, nxt, goals
+                return nxt
+
+        # No safe way to the fruit right now: chase the tail (which stays put
+        # while the snake is still growing), steering clear of the fruit so
+        # it isn't eaten by accident
+        tail = snake.body[0]
+        found = self._search(snake, head_idx, (tail.y * grid + tail.x,), through_tail=True, avoid=goals)
+        if found and len(found) > snake.growth_pending:
+            return found[0]
+        return self._fallback(snake, head_idx, goals)
+
+    def _goals(self, game: Game) -> tuple[int, ...]:
+        grid = self.grid_size
+        if game.special_active:
+            return tuple(c.y * grid + c.x for c in game.special_cells)
+        if game.fruit is not None:
+            return (game.fruit.y * grid + game.fruit.x,)
+        return ()
+
+    def _passable(self, snake: Snake, idx: int) -> bool:
+        # Free, or the tail cell that moves out this very tick
+        if not snake.occupancy[idx]:
+            return True
+        tail = snake.body[0]
+        return snake.growth_pending == 0 and idx == tail.y * self.grid_size + tail.x \
+            and snake.occupancy[idx] == 1
+
+    def _neighbours(self, idx: int) -> tuple[int, int, int, int]:
+        grid = self.grid_size
+        x, y = idx % grid, idx // grid
+        row = y * grid
+        return (row + (x + 1) % grid, row + (x - 1) % grid,
+                ((y + 1) % grid) * grid + x, ((y - 1) % grid) * grid + x)
+
+    def _fallback(self, snake: Snake, head_idx: int, avoid: tuple[int, ...]) -> int | None:
+        # Cheapest safe move: the free neighbour with the most free
+        # neighbours, fruit last
+        occ = snake.occupancy
+        best, best_free = None, -1
+        for n in self._neighbours(head_idx):
+            if not self._passable(snake, n):
+                continue
+            free = sum(1 for m in self._neighbours(n) if not occ[m])
+            if n not in avoid:
+                free += 4
+            if free > best_free:
+                best, best_free = n, free
+        return best
+
+    # ----------------------------
+    # Search
+    # ----------------------------
+    def _search(self, snake: Snake, start: int, goals: tuple[int, ...], through_tail: bool = False,
+                avoid: tuple[int, ...] = ()) -> list[int] | None:
+        """Wrap-aware A* from ``start``; the cells after it, or None.
+
+        Body cells and ``avoid`` are walls. ``through_tail`` lets the search
+        end on the tail cell (it is the goal when chasing the tail).
+        """
+        grid = self.grid_size
+        occ = snake.occupancy
+        goal_xy = [(g % grid, g // grid) for g in goals]
+        goal_set = set(goals)
+
+        def h(idx: int) -> int:
+            x, y = idx % grid, idx // grid
+            best = grid * 2
+            for gx, gy in goal_xy:
+                dx = abs(x - gx)
+                dy = abs(y - gy)
+                d = min(dx, grid - dx) + min(dy, grid - dy)
+                if d < best:
+                    best = d
+            return best
+
+        self.searches += 1
+        cost = {start: 0}
+        self._parent = parent = {start: -1}
+        # (f, -g, cell): ties go to the deepest node, which keeps A* narrow
+        heap = [(h(start), 0, start)]
+        expanded = 0
+        found = None
+        self._exhausted = False
+        while heap:
+            _, neg_g, idx = heapq.heappop(heap)
+            g = -neg_g
+            if g > cost[idx]:
+                continue  # stale entry
+            if idx in goal_set and idx != start:
+                found = self._unwind(idx, start)
+                break
+            if expanded >= self._budget or (expanded % CLOCK_EVERY == CLOCK_EVERY - 1 and self._out_of_time()):
+                self._exhausted = True
+                break
+            expanded += 1
+            ng = g + 1
+            for n in self._neighbours(idx):
+                if occ[n] and not (through_tail and n in goal_set):
+                    continue
+                if avoid and n in avoid:
+                    continue
+                if cost.get(n, ng + 1) <= ng:
+                    continue
+                cost[n] = ng
+                parent[n] = idx
+                heapq.heappush(heap, (ng + h(n), -ng, n))
+        self.nodes += expanded
+        self._budget -= expanded
+        return found
+
+    def _room(self, snake: Snake, start: int, need: int) -> bool:
+        # Flood fill from start, stopping as soon as `need` free cells are seen
+        occ = snake.occupancy
+        seen_cells = {start}
+        frontier = [start]
+        seen = 0
+        checked = 0
+        while frontier and seen < need and seen < self._budget:
+            checked += 1
+            if checked % CLOCK_EVERY == 0 and self._out_of_time():
+                break
+            idx = frontier.pop()
+            for n in self._neighbours(idx):
+                if not occ[n] and n not in seen_cells:
+                    seen_cells.add(n)
+                    frontier.append(n)
+                    seen += 1
+        self._budget -= seen
+        return seen >= need
+
+    def _out_of_time(self) -> bool:
+        # Past the tick's deadline: the rest of the tick gets no more search
+        if self._deadline is None or time.perf_counter() < self._deadline:
+            return False
+        self._budget = 0
+        return True
+
+    def _unwind(self, idx: int, start: int) -> list[int]:
+        path = []
+        parent = self._parent
+        while idx != start:
+            path.append(idx)
+            idx = parent[idx]
+        path.reverse()
+        return path
+
+    def _safe_after(self, snake: Snake, path: list[int], gain: int) -> bool:
+        """Can the head still reach the tail once it has walked ``path``?
+
+        ``gain`` is the growth the fruit at the end adds; the tail holds
+        still for that long, so the way back to it has to be longer.
+
+        Plays the path onto the occupancy grid in place (head cells in,
+        vacated tail cells out), searches head -> tail, then undoes it.
+        """
+        grid = self.grid_size
+        occ = snake.occupancy
+        body = snake.body
+        pops = max(0, len(path) - snake.growth_pending)
+        growth = max(0, snake.growth_pending - len(path)) + gain
+        vacated = [c.y * grid + c.x for c in islice(body, pops)]
+        if pops > len(body):
+            # Walked further than the whole body: part of the path is gone too
+            vacated.extend(path[:pops - len(body)])
+        if pops < len(body):
+            tail = body[pops].y * grid + body[pops].x
+        else:
+            tail = path[pops - len(body)]
+        for idx in path:
+            occ[idx] += 1
+        for idx in vacated:
+            occ[idx] -= 1
+        try:
+            found = self._search(snake, path[-1], (tail,), through_tail=True)
+            # Out of budget before reaching the tail: the region is larger
+            # than a tick's worth of search, which on these boards means open
+            if found is None:
+                return self._exhausted
+            if len(found) > growth:
+                return True
+            # The tail is too close to outlast the growth: fine if there is
+            # room to wander meanwhile. Going round behind the tail for a
+            # whole board's worth of ticks also settles for it being reachable.
+            return self._room(snake, path[-1], len(body) + growth) \
+                or self._stalled >= self.grid_size * self.grid_size
+        finally:
+            for idx in vacated:
+                occ[idx] += 1
+            for idx in path:
+                occ[idx] -= 1
+
+    # ----------------------------
+    # Hamiltonian cycle
+    # ----------------------------
+    def _build_cycle(self):
+        # Column 0 is the return lane; columns 1.. are swept row by row in a
+        # serpentine (needs an even grid)
+        grid = self.grid_size
+        order = []
+        for y in range(grid):
+            xs = range(1, grid) if y % 2 == 0 else range(grid - 1, 0, -1)
+            order.extend(y * grid + x for x in xs)
+        order.extend(y * grid for y in range(grid - 1, -1, -1))
+        self._cycle_next = nxt = array("i", bytes(4 * len(order)))
+        self._cycle_pos = pos = array("i", bytes(4 * len(order)))
+        for i, (a, b) in enumerate(zip(order, order[1:] + order[:1])):
+            nxt[a] = b
+            pos[a] = i
+
+    def _aligned(self, snake: Snake, head_idx: int) -> bool:
+        """Would riding the cycle from here never run into the body?
+
+        Segment ``i`` (tail = 0) leaves its cell on step ``growth + i + 1``;
+        the head reaches a cell ``d`` places ahead on the cycle on step
+        ``d``. Riding is safe when every segment is gone in time.
+        """
+        if self._cycle_pos is None:
+            self._build_cycle()
+        grid = self.grid_size
+        n_cells = grid * grid
+        pos = self._cycle_pos
+        hp = pos[head_idx]
+        leave = snake.growth_pending + 1
+        for i, seg in enumerate(snake.body):
+            if i == len(snake.body) - 1:
+                break  # the head itself
+            if (pos[seg.y * grid + seg.x] - hp) % n_cells < leave + i:
+                return False
+        self._budget -= len(snake.body)
+        return True
+
+    def _cycle_step(self, snake: Snake, head_idx: int) -> int | None:
+        if self._cycle_next is None:
+            self._build_cycle()
+        nxt = self._cycle_next[head_idx]
+        return nxt if self._passable(snake, nxt) else None
@@ -0,0 +1,310 @@
+"""Benchmarks for the simulation and rendering hot paths.
+
+Runs headless (SDL dummy video driver) and times the core operations across
+snake lengths and board sizes. Results are written as JSON; ``compare`` diffs
+two result files and exits non-zero when anything got slower than the
+threshold::
+
+    python bench.py run --out baseline.json
+    python bench.py run --out current.json
+    python bench.py compare baseline.json current.json --threshold 0.15
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import timeit
+from typing import Callable
+
+from arena import Arena
+from snake_core import Game, ManualClock, Point
+
+GRID_SIZES = [32, 64, 256]
+SNAKE_LENGTHS = [3, 30, 300, 1000]
+ARENA_SNAKES = [10, 100, 1000]
+VEC_ENVS = [1024, 4096]
+
+
+# ----------------------------
+# Fixtures
+# ----------------------------
+def cycle_path(grid_size: int) -> list[Point]:
+    """Hamiltonian cycle over an even-sized board.
+
+    Column 0 is the return lane; columns 1.. are swept row by row in a
+    serpentine. A snake that follows it never hits itself.
+    """
+    path = []
+    for y in range(grid_size):
+        xs = range(1, grid_size) if y % 2 == 0 else range(grid_size - 1, 0, -1)
+        path.extend(Point(x, y) for x in xs)
+    path.extend(Point(0, y) for y in range(grid_size - 1, -1, -1))
+    return path
+
+
+def make_game(grid_size: int, length: int, seed: int = 1,
+              body_runs: bool = False) -> tuple[Game, ManualClock, dict[Point, tuple[int, int]]]:
+    """Game whose snake lies along the cycle with ``length`` segments."""
+    clock = ManualClock()
+    game = Game(clock=clock, seed=seed, grid_size=grid_size, body_runs=body_runs)
+    game.special_spawn_chance = 0.0  # cases opt in explicitly
+    path = cycle_path(grid_size)
+    steer = {}
+    for a, b in zip(path, path[1:] + path[:1]):
+        dx = (b.x - a.x + 1) % grid_size - 1
+        dy = (b.y - a.y + 1) % grid_size - 1
+        steer[a] = (dx, dy)
+    snake = game.snake
+    while snake.body:
+        snake._pop_tail()
+    for cell in path[:length]:
+        snake._push_head(cell)
+    snake.direction = snake.pending_direction = Point(*steer[path[length - 2]])
+    game._roll_new_normal_fruit()
+    return game, clock, steer
+
+
+def follow(game: Game, steer: dict[Point, tuple[int, int]]):
+    # Stay on the cycle and hold the length under test constant
+    game.snake.set_direction(*steer[game.snake.head])
+    game.snake.growth_pending = 0
+
+
+def force_special(game: Game, now_ms: int):
+    cx = cy = game.grid_size // 2 - 1
+    game.special_cells = [Point(cx, cy), Point(cx + 1, cy), Point(cx, cy + 1), Point(cx + 1, cy + 1)]
+    game.special_active = True
+    game.special_spawned_at_ms = now_ms
+    game.special_duration_ms = 10 ** 12
+
+
+# ----------------------------
+# Cases
+# ----------------------------
+def simulation_cases(grid_size: int, length: int) -> dict[str, Callable[[], object]]:
+    cases = {}
+
+    game, _, _ = make_game(grid_size, length)
+    cases["Snake.step"] = game.snake.step
+
+    game, _, _ = make_game(grid_size, length, body_runs=True)
+    cases["Snake.step[runs]"] = game.snake.step
+
+    game, _, _ = make_game(grid_size, length)
+    cases["Snake.hits_self"] = game.snake.hits_self
+
+    game, _, _ = make_game(grid_size, length)
+    cases["Game._random_free_cell"] = game._random_free_cell
+
+    game, _, _ = make_game(grid_size, length)
+    cases["Game._roll_new_normal_fruit"] = game._roll_new_normal_fruit
+
+    game, clock, steer = make_game(grid_size, length)
+    game.special_spawn_chance = 0.01
+
+    def update():
+        follow(game, steer)
+        clock.advance(game.step_interval_ms())
+        game.update(clock())
+    cases["Game.update"] = update
+    return cases
+
+
+def arena_cases(grid_size: int, n_snakes: int) -> dict[str, Callable[[], object]]:
+    # Bots respawn, so the population stays put however long the run
+    arena = Arena(n_snakes, grid_size=grid_size, clock=ManualClock(), seed=1, player=False)
+    return {"Arena.step": arena.step}
+
+
+def vec_cases(grid_size: int, n_envs: int) -> dict[str, Callable[[], object]]:
+    # One batched step of n_envs games under random steering
+    import numpy as np
+    from vecenv import VecSnakeEnv
+
+    env = VecSnakeEnv(n_envs, grid_size=grid_size, seed=1)
+    actions = np.random.default_rng(1).integers(-1, 4, size=(64, n_envs))
+    tick = [0]
+
+    def step():
+        tick[0] += 1
+        env.step(actions[tick[0] % 64])
+
+    return {"VecSnakeEnv.step": step}
+
+
+def render_cases(grid_size: int, length: int, quality: int = 0) -> dict[str, Callable[[], object]]:
+    import pygame
+    from renderer import WINDOW_SIZE, BoardRenderer, CameraRenderer
+
+    if not pygame.get_init():
+        pygame.init()
+        pygame.display.set_mode((WINDOW_SIZE, WINDOW_SIZE))
+    surface = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE))
+    font = pygame.font.Font(None, 28)
+    big_font = pygame.font.Font(None, 48)
+
+    def make_renderer():
+        if grid_size == 32:
+            renderer = BoardRenderer(font, big_font)
+        else:
+            renderer = CameraRenderer(font, big_font, grid_size, 16)
+        renderer.set_quality(quality)
+        return renderer
+
+    # Reduced quality levels get their own names so baselines still compare
+    suffix = f" q={quality}" if quality else ""
+
+    cases = {}
+    for effect in ("plain", "special", "glow", "runs"):
+        game, clock, steer = make_game(grid_size, length, body_runs=effect == "runs")
+        if effect == "glow":
+            game.snake_glow_until_ms = 10 ** 12
+        renderer = make_renderer()
+
+        def frame(game=game, clock=clock, steer=steer, renderer=renderer, effect=effect):
+            # One logic step plus the frame that shows it
+            follow(game, steer)
+            game.advance()
+            clock.now_ms = game.last_step_ms
+            if effect == "special" and not game.special_active:
+                # Re-arm after the snake runs over it
+                force_special(game, clock())
+            renderer.draw(surface, game)
+
+        def full_frame(game=game, clock=clock, renderer=renderer, effect=effect):
+            if effect == "special" and not game.special_active:
+                force_special(game, clock())
+            renderer.invalidate()
+            renderer.draw(surface, game)
+
+        cases[f"draw[{effect}]{suffix}"] = frame
+        cases[f"draw_full[{effect}]{suffix}"] = full_frame
+    return cases
+
+
+def measure(fn: Callable[[], object], min_time: float, repeat: int) -> dict:
+    timer = timeit.Timer(fn)
+    # Calibrate so each sample runs for roughly min_time seconds
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time / 4 or number >= 1 << 20:
+            break
+        number *= 4
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    samples = [t / number * 1e9 for t in timer.repeat(repeat, number)]
+    return {"ns_min": min(samples), "ns_median": statistics.median(samples), "number": number}
+
+
+def run(args: argparse.Namespace) -> dict:
+    results = {}
+    for grid_size in args.grids:
+        for length in args.lengths:
+            if length >= grid_size * grid_size:
+                continue
+            groups = [simulation_cases]
+            if not args.no_render:
+                groups.append(lambda g, n: render_cases(g, n, args.quality))
+            for group in groups:
+                for name, fn in group(grid_size, length).items():
+                    key = f"{name} grid={grid_size} len={length}"
+                    if args.filter and args.filter not in key:
+                        continue
+                    results[key] = measure(fn, args.min_time, args.repeat)
+                    print(f"{key:<52} {results[key]['ns_min'] / 1000:10.2f} us", flush=True)
+        for n_snakes in args.arena_snakes:
+            # Leave the board mostly free so placement never runs out of room
+            if n_snakes * 3 * 8 > grid_size * grid_size:
+                continue
+            for name, fn in arena_cases(grid_size, n_snakes).items():
+                key = f"{name} grid={grid_size} snakes={n_snakes}"
+                if args.filter and args.filter not in key:
+                    continue
+                results[key] = measure(fn, args.min_time, args.repeat)
+                print(f"{key:<52} {results[key]['ns_min'] / 1000:10.2f} us", flush=True)
+        for n_envs in args.vec_envs:
+            try:
+                cases = vec_cases(grid_size, n_envs)
+            except ImportError:
+                print("numpy not installed: skipping VecSnakeEnv cases")
+                args.vec_envs = []
+                break
+            for name, fn in cases.items():
+                key = f"{name} grid={grid_size} envs={n_envs}"
+                if args.filter and args.filter not in key:
+                    continue
+                results[key] = measure(fn, args.min_time, args.repeat)
+                ns = results[key]["ns_min"]
+                print(f"{key:<52} {ns / 1000:10.2f} us  ({n_envs / ns * 1e3:.2f} M env-steps/s)", flush=True)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "system": platform.system(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> int:
+    regressions = 0
+    print(f"{'case':<52} {'base us':>10} {'now us':>10} {'change':>8}")
+    for key, now in current["results"].items():
+        base = baseline["results"].get(key)
+        if base is None:
+            continue
+        change = now["ns_min"] / base["ns_min"] - 1.0
+        flag = ""
+        if change > threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        print(f"{key:<52} {base['ns_min'] / 1000:10.2f} {now['ns_min'] / 1000:10.2f} {change:+8.1%}{flag}")
+    print(f"{regressions} regression(s) over {threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Snake benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_p = sub.add_parser("run", help="run the benchmarks")
+    run_p.add_argument("--out", default=None, help="write JSON results here")
+    run_p.add_argument("--grids", type=int, nargs="+", default=GRID_SIZES)
+    run_p.add_argument("--lengths", type=int, nargs="+", default=SNAKE_LENGTHS)
+    run_p.add_argument("--arena-snakes", type=int, nargs="+", default=ARENA_SNAKES)
+    run_p.add_argument("--vec-envs", type=int, nargs="+", default=VEC_ENVS, help="batch sizes for vecenv.py")
+    run_p.add_argument("--filter", default=None, help="only cases whose name contains this")
+    run_p.add_argument("--min-time", type=float, default=0.05, help="seconds per sample")
+    run_p.add_argument("--repeat", type=int, default=5)
+    run_p.add_argument("--no-render", action="store_true", help="skip the pygame cases")
+    run_p.add_argument("--quality", type=int, default=0, help="renderer quality level for the draw cases")
+    cmp_p = sub.add_parser("compare", help="flag regressions against a baseline")
+    cmp_p.add_argument("baseline")
+    cmp_p.add_argument("current")
+    cmp_p.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown (0.15 = 15%%)")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        data = run(args)
+        if args.out:
+            with open(args.out, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+        return 0
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, "r", encoding="utf-8") as f:
+        current = json.load(f)
+    return compare(baseline, current, args.threshold)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,289 @@
+"""Gameplay capture to a PNG sequence or an encoder pipe.
+
+The frame loop only blits the finished screen into a free surface from a
+small preallocated pool (a fraction of a millisecond) and queues it. An
+encoder thread writes the frames out and returns each surface to the pool.
+The pool bounds the queue. When it runs dry the frame is dropped, or with
+``overflow="scale"`` taken at half size from a second pool, so capture never
+stalls the game. For a raw pipe the encoder writes the surface's pixel buffer
+straight to the encoder's stdin (no conversion copy); pipe writes release
+the GIL. PNG encoding does not (``pygame.image.save`` holds it for the whole
+compression), so PNG frames are handed as raw bytes to a separate saver
+process over a short queue. When the saver falls behind, the queue fills, the
+encoder thread waits on it and the pool runs dry, so the game still never
+waits.
+
+A directory path gives a PNG sequence (``frame_000001.png``...). Any other
+path is piped to ffmpeg (``$FFMPEG`` or ``ffmpeg`` on the PATH) as raw
+frames. Capture runs on a fixed frame rate against the game clock. In pipe
+mode, the frame after a gap is repeated to fill it, so the video keeps time.
+
+Replays render straight to video with no display and no frame pacing, much
+faster than real time::
+
+    python capture.py replay replays/some_game.snkr game.mp4
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+import pygame
+
+CAPTURE_FPS = 30
+POOL_FRAMES = 8  # frames that can wait for the encoder before capture drops
+PNG_BACKLOG = 2  # raw frames queued for the PNG saver process
+TAIL_MS = 2000  # game-over screen kept at the end of a rendered replay
+
+
+# ----------------------------
+# Sinks (encoder thread)
+# ----------------------------
+def _save_pngs(directory: str, size: tuple[int, int], frames: multiprocessing.Queue):
+    # Saver process: its own GIL, so compression never stalls the game
+    while True:
+        item = frames.get()
+        if item is None:
+            return
+        index, data = item
+        frame = pygame.image.frombytes(data, size, "RGB")
+        pygame.image.save(frame, os.path.join(directory, f"frame_{index:06d}.png"))
+
+
+class PngSequence:
+    def __init__(self, directory: str, size: tuple[int, int], backlog: int = PNG_BACKLOG):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        # Spawned, not forked: the game process has a display and threads
+        ctx = multiprocessing.get_context("spawn")
+        self._frames = ctx.Queue(maxsize=backlog)
+        self.proc = ctx.Process(target=_save_pngs, args=(directory, size, self._frames), name="capture-png",
+                                daemon=True)
+        self.proc.start()
+
+    def write(self, index: int, frame: pygame.Surface):
+        if not self.proc.is_alive():
+            raise RuntimeError(f"PNG saver exited ({self.proc.exitcode})")
+        # Blocks while the saver is behind; the pool absorbs the wait
+        self._frames.put((index, pygame.image.tobytes(frame, "RGB")))
+
+    def close(self):
+        if self.proc.is_alive():
+            self._frames.put(None)
+        self.proc.join()
+
+
+def raw_format(surface: pygame.Surface) -> str | None:
+    """ffmpeg pixel format matching the surface's bytes, if it is a plain one."""
+    if surface.get_bytesize() != 4 or surface.get_pitch() != surface.get_width() * 4 or sys.byteorder != "little":
+        return None
+    r, g, b, a = surface.get_masks()
+    if (r, g, b) == (0xFF0000, 0xFF00, 0xFF):
+        return "bgra" if a else "bgr0"
+    if (r, g, b) == (0xFF, 0xFF00, 0xFF0000):
+        return "rgba" if a else "rgb0"
+    return None
+
+
+class EncoderPipe:
+    def __init__(self, path: str, size: tuple[int, int], fps: int, pix_fmt: str | None):
+        ffmpeg = os.environ.get("FFMPEG") or shutil.which("ffmpeg")
+        if not ffmpeg:
+            raise RuntimeError("ffmpeg not found (set $FFMPEG); capture to a directory for PNG frames")
+        # Unknown layouts are converted to packed RGB in the encoder thread
+        self.convert = pix_fmt is None
+        w, h = size
+        cmd = [ffmpeg, "-loglevel", "error", "-y", "-f", "rawvideo", "-pix_fmt", pix_fmt or "rgb24",
+               "-s", f"{w}x{h}", "-r", str(fps), "-i", "-", "-pix_fmt", "yuv420p", path]
+        self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+        self.last = -1
+
+    def write(self, index: int, frame: pygame.Surface):
+        data = pygame.image.tobytes(frame, "RGB") if self.convert else frame.get_view("0")
+        # Frames dropped since the last one are filled with this one so the
+        # video keeps time (the previous surface is already back in the pool)
+        for _ in range(index - self.last):
+            self.proc.stdin.write(data)
+        self.last = index
+
+    def close(self):
+        self.proc.stdin.close()
+        self.proc.wait()
+
+
+def default_path(stem: str) -> str:
+    """A video next to ``stem`` when ffmpeg is around, else a PNG directory."""
+    return stem + ".mp4" if os.environ.get("FFMPEG") or shutil.which("ffmpeg") else stem
+
+
+# ----------------------------
+# Recorder (frame path)
+# ----------------------------
+class Recorder:
+    def __init__(self, path: str, size: tuple[int, int], fps: int = CAPTURE_FPS, pool_frames: int = POOL_FRAMES,
+                 overflow: str = "drop", block: bool = False, like: pygame.Surface | None = None):
+        if overflow not in ("drop", "scale"):
+            raise ValueError("overflow must be 'drop' or 'scale'")
+        self.path = path
+        self.size = size
+        self.fps = fps
+        self.overflow = overflow
+        self.block = block  # wait for the encoder instead of dropping (headless)
+        # Same pixel format as the screen so the per-frame blit is a plain copy
+        make = (lambda s: pygame.Surface(s, 0, like)) if like is not None else pygame.Surface
+        full = [make(size) for _ in range(pool_frames)]
+        self._free = queue.SimpleQueue()
+        for s in full:
+            self._free.put(s)
+        self._half_size = (size[0] // 2, size[1] // 2)
+        self._free_half = queue.SimpleQueue()
+        if overflow == "scale":
+            for _ in range(pool_frames):
+                self._free_half.put(make(self._half_size))
+        self._upscaled = make(size) if overflow == "scale" else None
+        if os.path.isdir(path) or not os.path.splitext(path)[1]:
+            self.sink = PngSequence(path, size)
+        else:
+            self.sink = EncoderPipe(path, size, fps, raw_format(full[0]))
+        self._queue: queue.Queue = queue.Queue(maxsize=pool_frames * 2 + 1)
+        self._start_ms: int | None = None
+        self._next = 0  # next frame index due
+        # Stats
+        self.captured = 0
+        self.dropped = 0
+        self.scaled = 0
+        self.error: Exception | None = None
+        self._worker = threading.Thread(target=self._run, name="capture", daemon=True)
+        self._worker.start()
+
+    def capture(self, surface: pygame.Surface, now_ms: int):
+        """Grab the screen if a frame is due at ``now_ms``; never blocks unless ``block``."""
+        if self._start_ms is None:
+            self._start_ms = now_ms
+        index = (now_ms - self._start_ms) * self.fps // 1000
+        if index < self._next:
+            return
+        # Frames skipped by a slow game frame are counted as dropped
+        self.dropped += index - self._next
+        self._next = index + 1
+        if self.block:
+            frame = self._free.get()
+        else:
+            try:
+                frame = self._free.get_nowait()
+            except queue.Empty:
+                frame = None
+        if frame is not None:
+            frame.blit(surface, (0, 0))
+        else:
+            try:
+                frame = self._free_half.get_nowait()
+            except queue.Empty:
+                self.dropped += 1
+                return
+            pygame.transform.scale(surface, self._half_size, frame)
+            self.scaled += 1
+        self.captured += 1
+        self._queue.put((index, frame))
+
+    def close(self) -> str:
+        self._queue.put(None)
+        self._worker.join()
+        self.sink.close()
+        if self.error is not None:
+            return f"capture failed: {self.error}"
+        return f"{self.captured} frames to {self.path} ({self.dropped} dropped, {self.scaled} at half size)"
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            index, frame = item
+            try:
+                if self.error is None:
+                    if frame.get_size() != self.size:
+                        pygame.transform.scale(frame, self.size, self._upscaled)
+                        self.sink.write(index, self._upscaled)
+                    else:
+                        self.sink.write(index, frame)
+            except Exception as e:
+                # Disk full, encoder gone: stop writing, keep the game running
+                self.error = e
+            (self._free if frame.get_size() == self.size else self._free_half).put(frame)
+
+
+# ----------------------------
+# Headless replay rendering
+# ----------------------------
+def render_replay(replay_path: str, out_path: str, fps: int = CAPTURE_FPS, smooth: bool = False,
+                  cell: int = 16) -> tuple[Recorder, float]:
+    """Render a replay to video on its own timeline; returns the recorder and game seconds."""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import replay
+    from renderer import WINDOW_SIZE, BoardRenderer, CameraRenderer
+    from snake_core import GRID_SIZE, Game, ManualClock
+
+    pygame.init()
+    with open(replay_path, "rb") as f:
+        rep = replay.decode(f.read())
+    screen = pygame.display.set_mode((WINDOW_SIZE, WINDOW_SIZE))
+    font = pygame.font.Font(None, 28)
+    big_font = pygame.font.Font(None, 48)
+    if rep.grid_size == GRID_SIZE:
+        renderer = BoardRenderer(font, big_font, interpolate=smooth)
+    else:
+        renderer = CameraRenderer(font, big_font, rep.grid_size, cell, screen.get_size(), interpolate=smooth)
+    clock = ManualClock(0)
+    game = Game(clock=clock, seed=rep.seed, grid_size=rep.grid_size)
+    recorder = Recorder(out_path, screen.get_size(), fps, block=True, like=screen)
+
+    # The replay's own stepping, taken up to each frame's time
+    pending = replay.steps(rep, game)
+    due = next(pending, None)
+    frame = 0
+    end_ms = None
+    while True:
+        # Rounded up so the recorder sees every frame as due
+        t = -(-frame * 1000 // fps)
+        while due is not None and due <= t:
+            due = next(pending, None)
+        if end_ms is None and due is None:
+            end_ms = t
+        clock.now_ms = t
+        renderer.draw(screen, game)
+        recorder.capture(screen, t)
+        if end_ms is not None and t - end_ms >= TAIL_MS:
+            break
+        frame += 1
+    if game.score != rep.score:
+        print(f"warning: replay claims {rep.score}, rendered game scored {game.score}")
+    return recorder, t / 1000.0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Render snake replays to video")
+    sub = parser.add_subparsers(dest="command", required=True)
+    r = sub.add_parser("replay", help="render a replay file headless")
+    r.add_argument("replay")
+    r.add_argument("out", help="video file (piped to ffmpeg) or a directory for PNG frames")
+    r.add_argument("--fps", type=int, default=CAPTURE_FPS)
+    r.add_argument("--smooth", action="store_true", help="interpolate movement between logic steps")
+    r.add_argument("--cell", type=int, default=16, help="cell size in pixels for large boards")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    recorder, game_s = render_replay(args.replay, args.out, args.fps, args.smooth, args.cell)
+    print(recorder.close())
+    elapsed = time.perf_counter() - start
+    print(f"{game_s:.1f}s of play rendered in {elapsed:.1f}s ({game_s / elapsed:.1f}x real time)")
+    return 1 if recorder.error is not None else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""Adaptive effect quality driven by the frame-time budget.
+
+The governor watches how long each frame's work takes (everything but the
+frame cap wait) and moves the renderer's quality level (see
+``renderer.QUALITY_LEVELS``):
+
+- every ``window`` frames it takes the 90th percentile of the work times;
+- over ``down_at`` x budget it steps down one level at once;
+- under ``up_at`` x budget for ``up_after`` frames in a row it steps back up.
+
+The gap between the two thresholds is the hysteresis. A level that turns out
+too expensive right after a step up doubles the wait before the next try, so
+a device sitting on the edge settles instead of flipping every few seconds.
+
+Not every cut pays off everywhere (half resolution trades fill rate for a
+full-window scale). If the lowest level is no faster than the one above it,
+the governor goes back up and stops using it.
+"""
+from profiler import percentile
+
+WINDOW_FRAMES = 30  # frames per decision (half a second at 60 fps)
+DOWN_AT = 0.9  # share of the budget that counts as over
+UP_AT = 0.5  # share of the budget that counts as headroom
+UP_AFTER_FRAMES = 180  # headroom needed before stepping back up
+MAX_UP_AFTER_FRAMES = 3600
+
+
+class QualityGovernor:
+    def __init__(self, levels: int, budget_ms: float, window: int = WINDOW_FRAMES, down_at: float = DOWN_AT,
+                 up_at: float = UP_AT, up_after: int = UP_AFTER_FRAMES):
+        self.levels = levels
+        self.budget_ms = budget_ms
+        self.window = window
+        self.down_at = down_at
+        self.up_at = up_at
+        self.base_up_after = up_after
+        self.up_after = up_after
+        self.level = 0
+        self.floor = levels - 1  # lowest level still worth using
+        self.last_p90 = 0.0  # work p90 of the last decision window, for logs
+        self._samples: list[float] = []
+        self._headroom = 0  # frames in a row under up_at
+        self._frames = 0
+        self._raised_at: int | None = None  # frame of the last step up
+        self._dropped_from: float | None = None  # p90 just before the last step down
+
+    def observe(self, work_ms: float) -> bool:
+        """Record one frame; True when the level changed."""
+        self._frames += 1
+        samples = self._samples
+        samples.append(work_ms)
+        if len(samples) < self.window:
+            return False
+        samples.sort()
+        p90 = self.last_p90 = percentile(samples, 90)
+        samples.clear()
+
+        over = p90 > self.budget_ms * self.down_at
+        if not over and self._raised_at is not None and self._frames - self._raised_at > self.up_after:
+            # Held up fine: later recoveries can be quick again
+            self._raised_at = None
+            self.up_after = self.base_up_after
+        dropped_from, self._dropped_from = self._dropped_from, None
+        if over:
+            self._headroom = 0
+            if self.level == self.floor and dropped_from is not None and p90 >= dropped_from * 0.95:
+                # The last cut bought nothing here: undo it for good
+                self.floor -= 1
+                self.level -= 1
+                return True
+            if self.level >= self.floor:
+                return False
+            if self._raised_at is not None and self._frames - self._raised_at <= self.up_after:
+                # The level we came back to can't hold the budget: wait longer
+                self.up_after = min(self.up_after * 2, MAX_UP_AFTER_FRAMES)
+            self._raised_at = None
+            self._dropped_from = p90
+            self.level += 1
+            return True
+        if p90 < self.budget_ms * self.up_at and self.level > 0:
+            self._headroom += self.window
+            if self._headroom >= self.up_after:
+                self._headroom = 0
+                self._raised_at = self._frames
+                self.level -= 1
+                return True
+            return False
+        self._headroom = 0
+        return False
@@ -0,0 +1,293 @@
+"""Networked leaderboard client.
+
+``submit`` only appends to an in-memory queue, so the frame loop never
+waits on the network. A background worker sends queued scores in batches
+(``POST /scores``) over one keep-alive connection that it reuses until it
+fails. Failed sends are retried with exponential backoff plus jitter. Each
+score carries a client-made id, so the server can drop the duplicates that
+retries produce.
+
+Scores not yet accepted by the server are spooled to a JSON file by the
+worker, so they survive going offline or quitting, and are sent on the next
+run. ``top`` returns the last fetched top list at once and asks the worker
+for a fresh one when it is older than the TTL.
+
+Desktop only: the browser build has no threads or sockets and keeps to
+``scores.ScoreStore``. ``leaderboard_server.py`` is a local stand-in for the
+service.
+"""
+import http.client
+import json
+import os
+import random
+import threading
+import time
+import urllib.parse
+import uuid
+from collections import deque
+
+BATCH_SIZE = 50  # scores per request
+LINGER_MS = 200  # wait this long for more scores before sending a partial batch
+TOP_TTL_S = 30.0  # how long a fetched top list is shown before refreshing
+BACKOFF_S = 0.5  # first retry delay; doubles per failure
+MAX_BACKOFF_S = 60.0
+
+
+class LeaderboardError(Exception):
+    def __init__(self, status: int, reason: str):
+        super().__init__(f"{status} {reason}")
+        self.status = status
+
+
+class LeaderboardClient:
+    def __init__(self, url: str, nickname: str = "Anonymous", spool_path: str | None = None,
+                 batch_size: int = BATCH_SIZE, linger_ms: int = LINGER_MS, ttl_s: float = TOP_TTL_S,
+                 timeout_s: float = 5.0, max_backoff_s: float = MAX_BACKOFF_S):
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"not an http(s) URL: {url!r}")
+        self.url = url
+        self._https = parts.scheme == "https"
+        self._host = parts.hostname
+        self._port = parts.port
+        self._base = parts.path.rstrip("/")
+        self.nickname = nickname
+        self.spool_path = spool_path
+        self.batch_size = batch_size
+        self.linger_s = linger_ms / 1000.0
+        self.ttl_s = ttl_s
+        self.timeout_s = timeout_s
+        self.max_backoff_s = max_backoff_s
+        self._cond = threading.Condition()
+        self._queue: deque[dict] = deque()  # oldest first, removed once accepted
+        self._spooled = True  # spool file matches the queue
+        # File writes happen outside _cond, which the frame loop takes; this
+        # lock only orders the writers (worker and close)
+        self._spool_lock = threading.Lock()
+        self._spool_seq = 0  # snapshots taken
+        self._spool_written = 0  # newest snapshot on disk
+        self._top: list[tuple[str, int]] | None = None
+        self._top_at = float("-inf")
+        self._want_top = False
+        self._failures = 0
+        self._retry_at = 0.0
+        self._closing = False
+        self._conn: http.client.HTTPConnection | None = None
+        self._worker: threading.Thread | None = None
+        # Stats
+        self.sent = 0
+        self.batches = 0
+        self.errors = 0
+        self._load_spool()
+        if self._queue:
+            self._start()
+
+    # ----------------------------
+    # Frame path (memory only)
+    # ----------------------------
+    def submit(self, score: int):
+        entry = {"id": uuid.uuid4().hex, "nickname": self.nickname, "score": int(score),
+                 "timestamp": int(time.time() * 1000)}
+        with self._cond:
+            self._queue.append(entry)
+            self._spooled = False
+            self._cond.notify()
+        self._start()
+
+    def top(self, n: int = 15) -> list[tuple[str, int]] | None:
+        """Cached (nickname, score) list, or None before the first fetch."""
+        with self._cond:
+            if time.monotonic() - self._top_at >= self.ttl_s and not self._want_top:
+                self._want_top = True
+                self._cond.notify()
+            top = self._top
+        self._start()
+        return top[:n] if top is not None else None
+
+    @property
+    def pending(self) -> int:
+        return len(self._queue)
+
+    def close(self, timeout_s: float = 1.0):
+        """Give queued scores ``timeout_s`` to go out, then spool the rest."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        if self._worker is not None:
+            self._worker.join(timeout_s)
+        with self._cond:
+            spool = self._take_spool()
+        if spool is not None:
+            self._write_spool(*spool)
+
+    # ----------------------------
+    # Worker
+    # ----------------------------
+    def _start(self):
+        if self._worker is None:
+            with self._cond:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name="leaderboard", daemon=True)
+                    self._worker.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                batch, fetch = self._next_work()
+                if batch is None and not fetch:
+                    self._drop_connection()
+                    return  # closing and nothing left to send
+                spool = self._take_spool()
+            if spool is not None:
+                # Off the frame path and outside the lock: persist what is still unsent
+                self._write_spool(*spool)
+            if batch:
+                self._send(batch)
+            elif fetch:
+                self._fetch_top()
+
+    def _next_work(self) -> tuple[list[dict] | None, bool]:
+        # Called with the lock held; waits until there is something to do
+        while True:
+            now = time.monotonic()
+            if now < self._retry_at:
+                if self._closing:
+                    return None, False
+                self._cond.wait(self._retry_at - now)
+                continue
+            if self._queue:
+                # Linger a little so scores arriving together share a request
+                oldest = self._queue[0]["timestamp"] / 1000.0
+                wait = oldest + self.linger_s - time.time()
+                if len(self._queue) < self.batch_size and wait > 0 and not self._closing:
+                    self._cond.wait(wait)
+                    continue
+                return [self._queue[i] for i in range(min(self.batch_size, len(self._queue)))], False
+            if self._want_top and not self._closing:
+                return [], True
+            if self._closing:
+                return None, False
+            self._cond.wait()
+
+    def _send(self, batch: list[dict]):
+        try:
+            result = self._request("POST", "/scores", {"scores": batch})
+        except LeaderboardError as e:
+            if e.status == 429 or e.status >= 500:
+                self._backoff()
+                return
+            # Rejected for good (bad request): drop it rather than retry forever
+            self.errors += 1
+            result = None
+        except (OSError, http.client.HTTPException, ValueError):
+            self._backoff()
+            return
+        with self._cond:
+            for _ in batch:
+                self._queue.popleft()
+            self._spooled = False
+            self._failures = 0
+            if result is not None:
+                self.sent += len(batch)
+                self.batches += 1
+                # Scores changed: the next top() fetches again
+                self._top_at = float("-inf")
+
+    def _fetch_top(self):
+        try:
+            result = self._request("GET", "/top?n=15")
+            top = [(str(e.get("nickname") or "Anonymous"), int(e["score"])) for e in result["scores"]]
+        except (LeaderboardError, OSError, http.client.HTTPException, ValueError, KeyError, TypeError):
+            self._backoff()
+            return
+        with self._cond:
+            self._top = top
+            self._top_at = time.monotonic()
+            self._want_top = False
+            self._failures = 0
+
+    def _backoff(self):
+        self.errors += 1
+        self._drop_connection()
+        with self._cond:
+            self._failures += 1
+            delay = min(self.max_backoff_s, BACKOFF_S * 2 ** (self._failures - 1))
+            # Full jitter so many clients coming back online don't retry in step
+            self._retry_at = time.monotonic() + random.uniform(delay / 2, delay)
+
+    # ----------------------------
+    # HTTP
+    # ----------------------------
+    def _connection(self) -> http.client.HTTPConnection:
+        if self._conn is None:
+            cls = http.client.HTTPSConnection if self._https else http.client.HTTPConnection
+            self._conn = cls(self._host, self._port, timeout=self.timeout_s)
+        return self._conn
+
+    def _drop_connection(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _request(self, method: str, path: str, body: dict | None = None) -> dict:
+        conn = self._connection()
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        headers = {"Connection": "keep-alive", "Accept": "application/json"}
+        if data is not None:
+            headers["Content-Type"] = "application/json"
+        try:
+            conn.request(method, self._base + path, body=data, headers=headers)
+            response = conn.getresponse()
+            payload = response.read()
+        except (OSError, http.client.HTTPException):
+            # The server may have closed an idle keep-alive connection
+            self._drop_connection()
+            raise
+        if response.will_close:
+            self._drop_connection()
+        if response.status >= 400:
+            raise LeaderboardError(response.status, response.reason)
+        return json.loads(payload) if payload else {}
+
+    # ----------------------------
+    # Offline spool
+    # ----------------------------
+    def _load_spool(self):
+        if self.spool_path is None:
+            return
+        try:
+            with open(self.spool_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, list):
+                self._queue.extend(e for e in data if isinstance(e, dict) and "id" in e and "score" in e)
+        except FileNotFoundError:
+            pass
+        except Exception:
+            pass
+
+    def _take_spool(self) -> tuple[int, list[dict]] | None:
+        # Called with the lock held: a copy of the queue if the file is stale
+        if self._spooled:
+            return None
+        self._spooled = True
+        self._spool_seq += 1
+        return self._spool_seq, list(self._queue)
+
+    def _write_spool(self, seq: int, entries: list[dict]):
+        if self.spool_path is None:
+            return
+        with self._spool_lock:
+            if seq <= self._spool_written:
+                return  # a newer snapshot is already on disk
+            self._spool_written = seq
+            try:
+                if not entries:
+                    if os.path.exists(self.spool_path):
+                        os.remove(self.spool_path)
+                    return
+                tmp_path = self.spool_path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(entries, f)
+                os.replace(tmp_path, self.spool_path)
+            except Exception:
+                pass
@@ -0,0 +1,246 @@
+"""Local stand-in for the leaderboard service, plus a load generator.
+
+Speaks the same small JSON API the client uses:
+
+    POST /scores   {"scores": [{"id", "nickname", "score", "timestamp"}, ...]}
+    GET  /top?n=15 {"scores": [{"nickname", "score", "timestamp"}, ...]}
+
+Scores are kept in memory and are keyed by id, so a resent batch does not
+count twice. The server runs on asyncio with HTTP/1.1 keep-alive, so one
+process can hold thousands of open client connections. ``--fail-rate`` and
+``--latency-ms`` make it misbehave for exercising the client's retry path::
+
+    python leaderboard_server.py serve --port 8765
+    python main.py --leaderboard http://127.0.0.1:8765
+    python leaderboard_server.py load --url http://127.0.0.1:8765 --clients 2000
+"""
+import argparse
+import asyncio
+import bisect
+import json
+import random
+import sys
+import time
+import urllib.parse
+
+MAX_BODY = 1 << 20
+MAX_TOP = 100
+KEEP = 10_000  # ranked entries kept; lower scores are dropped
+
+
+class Board:
+    def __init__(self, keep: int = KEEP):
+        self.keep = keep
+        self.seen: set[str] = set()
+        # (-score, timestamp, nickname) ascending == best first
+        self.ranked: list[tuple[int, int, str]] = []
+        self.version = 0
+        self._top_cache: dict[int, tuple[int, bytes]] = {}
+        self.accepted = 0
+
+    def add(self, entries: list[dict]) -> int:
+        added = 0
+        for e in entries:
+            sid = str(e["id"])
+            if sid in self.seen:
+                continue
+            self.seen.add(sid)
+            nickname = str(e.get("nickname") or "Anonymous")[:20]
+            key = (-int(e["score"]), int(e.get("timestamp", 0)), nickname)
+            if len(self.ranked) < self.keep or key < self.ranked[-1]:
+                bisect.insort(self.ranked, key)
+                if len(self.ranked) > self.keep:
+                    self.ranked.pop()
+            added += 1
+        if added:
+            self.version += 1
+            self.accepted += added
+        return added
+
+    def top_json(self, n: int) -> bytes:
+        # Encoded once per board change; most requests are reads
+        cached = self._top_cache.get(n)
+        if cached is not None and cached[0] == self.version:
+            return cached[1]
+        scores = [{"nickname": name, "score": -neg, "timestamp": ts} for neg, ts, name in self.ranked[:n]]
+        body = json.dumps({"scores": scores}).encode("utf-8")
+        self._top_cache[n] = (self.version, body)
+        return body
+
+
+# ----------------------------
+# Server
+# ----------------------------
+class Server:
+    def __init__(self, board: Board, fail_rate: float = 0.0, latency_ms: int = 0):
+        self.board = board
+        self.fail_rate = fail_rate
+        self.latency_ms = latency_ms
+        self.requests = 0
+        self.connections = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                method, target, version = line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = h.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY:
+                    await self._respond(writer, 413, {"error": "too large"}, close=True)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                close = headers.get("connection", "").lower() == "close" or version == "HTTP/1.0"
+                status, payload = await self.route(method, target, body)
+                await self._respond(writer, status, payload, close)
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def route(self, method: str, target: str, body: bytes) -> tuple[int, dict | bytes]:
+        self.requests += 1
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000.0)
+        if self.fail_rate and random.random() < self.fail_rate:
+            return 503, {"error": "injected failure"}
+        url = urllib.parse.urlsplit(target)
+        if method == "POST" and url.path == "/scores":
+            try:
+                entries = json.loads(body)["scores"]
+                added = self.board.add(entries)
+            except (ValueError, KeyError, TypeError):
+                return 400, {"error": "bad scores"}
+            return 200, {"accepted": added}
+        if method == "GET" and url.path == "/top":
+            query = urllib.parse.parse_qs(url.query)
+            try:
+                n = max(1, min(MAX_TOP, int(query.get("n", ["15"])[0])))
+            except ValueError:
+                return 400, {"error": "bad n"}
+            return 200, self.board.top_json(n)
+        return 404, {"error": "not found"}
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, payload: dict | bytes, close: bool):
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large",
+                  503: "Service Unavailable"}.get(status, "")
+        head = (f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: {'close' if close else 'keep-alive'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+
+async def serve(host: str, port: int, server: Server):
+    listener = await asyncio.start_server(server.handle, host, port, backlog=4096)
+    print(f"leaderboard on http://{host}:{port}")
+    async with listener:
+        await listener.serve_forever()
+
+
+# ----------------------------
+# Load generator
+# ----------------------------
+async def _client(host: str, port: int, path: str, n: int, batches: int, batch: int,
+                  latencies: list[float], errors: list[int]):
+    # One simulated player: a keep-alive connection posting batches and reading the top list
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        errors[0] += 1
+        return
+    try:
+        for b in range(batches):
+            scores = [{"id": f"{n}-{b}-{i}", "nickname": f"bot{n}", "score": random.randint(0, 500),
+                       "timestamp": int(time.time() * 1000)} for i in range(batch)]
+            for method, target, body in (("POST", path + "/scores", json.dumps({"scores": scores}).encode()),
+                                         ("GET", path + "/top?n=15", b"")):
+                start = time.perf_counter()
+                writer.write((f"{method} {target} HTTP/1.1\r\nHost: {host}\r\n"
+                              f"Content-Length: {len(body)}\r\n\r\n").encode("latin-1") + body)
+                status = int((await reader.readline()).split()[1])
+                length = 0
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b""):
+                        break
+                    if h.lower().startswith(b"content-length:"):
+                        length = int(h.split(b":")[1])
+                await reader.readexactly(length)
+                latencies.append((time.perf_counter() - start) * 1000.0)
+                if status >= 400:
+                    errors[0] += 1
+    except (OSError, asyncio.IncompleteReadError, ValueError, IndexError):
+        errors[0] += 1
+    finally:
+        writer.close()
+
+
+async def load(url: str, clients: int, batches: int, batch: int, concurrency: int):
+    parts = urllib.parse.urlsplit(url)
+    host, port, path = parts.hostname, parts.port or 80, parts.path.rstrip("/")
+    latencies: list[float] = []
+    errors = [0]
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one(n: int):
+        async with gate:
+            await _client(host, port, path, n, batches, batch, latencies, errors)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(n) for n in range(clients)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+
+    def pct(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else 0.0
+
+    print(f"{clients} clients, {len(latencies)} requests in {elapsed:.2f}s "
+          f"({len(latencies) / elapsed:.0f} req/s, {clients * batches * batch / elapsed:.0f} scores/s)")
+    print(f"latency ms  p50 {pct(0.5):.2f}  p99 {pct(0.99):.2f}  max {pct(1.0):.2f}  errors {errors[0]}")
+    return errors[0]
+
+
+# ----------------------------
+# CLI
+# ----------------------------
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Stand-in leaderboard server and load generator")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve_p = sub.add_parser("serve", help="run the stand-in server")
+    serve_p.add_argument("--host", default="127.0.0.1")
+    serve_p.add_argument("--port", type=int, default=8765)
+    serve_p.add_argument("--fail-rate", type=float, default=0.0, help="answer this share of requests with 503")
+    serve_p.add_argument("--latency-ms", type=int, default=0, help="delay every response")
+    load_p = sub.add_parser("load", help="hammer a server with simulated clients")
+    load_p.add_argument("--url", default="http://127.0.0.1:8765")
+    load_p.add_argument("--clients", type=int, default=1000)
+    load_p.add_argument("--batches", type=int, default=5, help="batches posted per client")
+    load_p.add_argument("--batch", type=int, default=10, help="scores per batch")
+    load_p.add_argument("--concurrency", type=int, default=1000, help="connections open at once")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        try:
+            asyncio.run(serve(args.host, args.port, Server(Board(), args.fail_rate, args.latency_ms)))
+        except KeyboardInterrupt:
+            pass
+        return 0
+    errors = asyncio.run(load(args.url, args.clients, args.batches, args.batch, args.concurrency))
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
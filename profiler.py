@@ -0,0 +1,151 @@
+"""Frame profiler for the main loop.
+
+Each frame is split into sections (event handling, logic update, score I/O,
+drawing, presenting and waiting for the frame cap). The loop calls ``lap``
+after each piece of work, which charges the time since the previous lap to a
+section; a section can be lapped several times per frame and accumulates.
+Timings live in a fixed-size ring buffer of integer nanoseconds, so recording
+allocates nothing and costs a couple of ``perf_counter_ns`` calls per frame.
+
+The buffer can be dumped as CSV (one row per frame) or as a Chrome trace
+(``chrome://tracing`` / Perfetto), where each frame is laid out as its
+sections back to back in ``SECTIONS`` order. Each frame also keeps the
+renderer quality level it was drawn at (``quality``, set by the governor).
+"""
+import csv
+import json
+import time
+from array import array
+
+SECTIONS = ("events", "update", "scores", "draw", "present", "wait")
+EVENTS, UPDATE, SCORES, DRAW, PRESENT, WAIT = range(len(SECTIONS))
+# Frame time excluding the frame cap sleep
+WORK_SECTIONS = (EVENTS, UPDATE, SCORES, DRAW, PRESENT)
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    i = min(len(sorted_values) - 1, int(q / 100.0 * len(sorted_values)))
+    return sorted_values[i]
+
+
+class FrameProfiler:
+    def __init__(self, capacity: int = 600, sections: tuple[str, ...] = SECTIONS):
+        self.capacity = capacity
+        self.sections = sections
+        self.frames = 0  # frames recorded since start (the buffer keeps the last `capacity`)
+        self._width = len(sections)
+        self._starts = array("q", bytes(8 * capacity))
+        self._times = array("q", bytes(8 * capacity * self._width))
+        self._quality = array("b", bytes(capacity))
+        self.quality = 0  # renderer quality level, stamped on each frame
+        self._row = 0
+        self._last = 0
+        self._epoch = time.perf_counter_ns()
+
+    def __len__(self) -> int:
+        return min(self.frames, self.capacity)
+
+    # ----------------------------
+    # Recording (frame path)
+    # ----------------------------
+    def begin(self):
+        now = time.perf_counter_ns()
+        self._row = row = self.frames % self.capacity
+        self._starts[row] = now - self._epoch
+        base = row * self._width
+        for i in range(base, base + self._width):
+            self._times[i] = 0
+        self._last = now
+
+    def lap(self, section: int):
+        now = time.perf_counter_ns()
+        self._times[self._row * self._width + section] += now - self._last
+        self._last = now
+
+    def end(self):
+        self._quality[self._row] = self.quality
+        self.frames += 1
+
+    def last_ms(self, sections=WORK_SECTIONS) -> float:
+        """The frame just ended, in milliseconds (work only by default)."""
+        row = (self.frames - 1) % self.capacity * self._width
+        return sum(self._times[row + s] for s in sections) / 1e6
+
+    # ----------------------------
+    # Queries
+    # ----------------------------
+    def qualities(self, last: int | None = None) -> list[int]:
+        """Quality level of each recorded frame, oldest first (as ``rows``)."""
+        n = len(self)
+        if last is not None:
+            n = min(n, last)
+        return [self._quality[frame % self.capacity] for frame in range(self.frames - n, self.frames)]
+
+    def rows(self, last: int | None = None) -> list[tuple[int, list[int]]]:
+        """(start_ns, per-section ns) for recorded frames, oldest first."""
+        n = len(self)
+        if last is not None:
+            n = min(n, last)
+        w = self._width
+        out = []
+        for frame in range(self.frames - n, self.frames):
+            row = frame % self.capacity
+            out.append((self._starts[row], list(self._times[row * w:(row + 1) * w])))
+        return out
+
+    def frame_ms(self, last: int | None = None, sections=None) -> list[float]:
+        """Per-frame totals in milliseconds (all sections unless given)."""
+        if sections is None:
+            return [sum(times) / 1e6 for _, times in self.rows(last)]
+        return [sum(times[s] for s in sections) / 1e6 for _, times in self.rows(last)]
+
+    def section_mean_ms(self, last: int | None = None) -> list[float]:
+        rows = self.rows(last)
+        if not rows:
+            return [0.0] * self._width
+        return [sum(times[s] for _, times in rows) / len(rows) / 1e6 for s in range(self._width)]
+
+    def summary(self, last: int | None = None) -> dict[str, float]:
+        frames = sorted(self.frame_ms(last))
+        work = sorted(self.frame_ms(last, WORK_SECTIONS))
+        return {
+            "frames": len(frames),
+            "p50": percentile(frames, 50),
+            "p95": percentile(frames, 95),
+            "p99": percentile(frames, 99),
+            "max": frames[-1] if frames else 0.0,
+            "work_p50": percentile(work, 50),
+            "work_p99": percentile(work, 99),
+            "quality": self.quality,
+        }
+
+    # ----------------------------
+    # Export
+    # ----------------------------
+    def write_csv(self, path: str):
+        first = self.frames - len(self)
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame", "start_ms"] + [f"{name}_ms" for name in self.sections]
+                            + ["total_ms", "quality"])
+            for i, ((start, times), quality) in enumerate(zip(self.rows(), self.qualities())):
+                writer.writerow([first + i, f"{start / 1e6:.3f}"]
+                                + [f"{t / 1e6:.3f}" for t in times]
+                                + [f"{sum(times) / 1e6:.3f}", quality])
+
+    def write_chrome_trace(self, path: str):
+        events = []
+        first = self.frames - len(self)
+        for i, ((start, times), quality) in enumerate(zip(self.rows(), self.qualities())):
+            ts = start / 1000.0
+            events.append({"name": "frame", "cat": "frame", "ph": "X", "pid": 1, "tid": 1,
+                           "ts": ts, "dur": sum(times) / 1000.0, "args": {"frame": first + i, "quality": quality}})
+            for name, t in zip(self.sections, times):
+                if t:
+                    events.append({"name": name, "cat": "section", "ph": "X", "pid": 1, "tid": 1,
+                                   "ts": ts, "dur": t / 1000.0})
+                    ts += t / 1000.0
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
@@ -0,0 +1,821 @@
+"""Board rendering on top of the simulation core.
+
+The grid background is rendered once and kept as a surface. Each frame the
+renderer works out which screen rectangles changed (new head, old head,
+vacated tail cells, fruit, special fruit, score and turbo bar), repaints just
+those from the cached background and returns them for
+``pygame.display.update``. Anything that touches the whole board (snake glow,
+game over overlay, a new game or a screen switch) falls back to a full redraw.
+
+Cells are drawn from a ``SpriteAtlas`` built once per cell size, so a frame
+is plain (batched) blits; the rainbow glows are pre-rendered per hue bucket
+and composited only inside the bounding box they cover.
+
+Renderers can step down their effects (``set_quality``, driven by the frame
+budget governor in ``governor.py``): glows, rounded corners, grid lines and,
+for the scrolling views, the internal resolution.
+"""
+import colorsys
+from collections import OrderedDict, deque
+
+import pygame
+
+from arena import Arena
+from profiler import FrameProfiler
+from snake_core import GRID_SIZE, Game, RunBody
+
+
+# ----------------------------
+# Display configuration
+# ----------------------------
+WINDOW_SIZE = 1200  # requested desktop window size
+CELL_SIZE = WINDOW_SIZE // GRID_SIZE  # pixels per cell
+BOARD_PIXELS = CELL_SIZE * GRID_SIZE
+BOARD_OFFSET = (WINDOW_SIZE - BOARD_PIXELS) // 2  # center the board
+
+# Colors
+BLACK = (10, 10, 10)
+DARK = (18, 18, 18)
+WHITE = (240, 240, 240)
+SNAKE_COLOR = (60, 205, 120)
+SNAKE_HEAD_COLOR = (40, 180, 100)
+GRID_COLOR = (30, 30, 30)
+FRUIT_COLORS = [
+    (235, 64, 52),   # red
+    (255, 165, 0),   # orange
+    (255, 215, 0),   # gold
+    (186, 85, 211),  # plum
+    (30, 144, 255),  # dodger blue
+]
+
+HUE_BUCKETS = 48  # rainbow glow steps; more look smoother, cost memory only
+
+# Effect quality, best first; each level keeps the cuts of the ones before
+QUALITY_LEVELS = ("full", "lite glow", "no glow", "square cells", "no grid", "half resolution")
+Q_LITE_GLOW, Q_NO_GLOW, Q_SQUARE, Q_NO_GRID, Q_HALF_RES = range(1, len(QUALITY_LEVELS))
+
+# HUD layout (top-right turbo bar, label to its left)
+TURBO_BAR = pygame.Rect(WINDOW_SIZE - 160 - 10, 10, 160, 14)
+SCORE_POS = (10, 8)
+
+
+class TextCache:
+    """Bounded LRU of rendered text surfaces.
+
+    Keyed by font, string, antialias and colour; almost every label on screen
+    is identical from one frame to the next, so ``render`` is usually a dict
+    lookup instead of a glyph rasterisation.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._surfaces: OrderedDict[tuple, pygame.Surface] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._surfaces)
+
+    def render(self, font: pygame.font.Font, text: str, antialias: bool, color) -> pygame.Surface:
+        key = (font, text, antialias, tuple(color))
+        surf = self._surfaces.get(key)
+        if surf is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surf
+        self.misses += 1
+        surf = font.render(text, antialias, color)
+        self._surfaces[key] = surf
+        if len(self._surfaces) > self.maxsize:
+            self._surfaces.popitem(last=False)
+        return surf
+
+    def clear(self):
+        self._surfaces.clear()
+
+
+# Shared by the board renderer and the menu screens
+text_cache = TextCache()
+
+
+def rainbow(hue: float) -> tuple[int, int, int]:
+    r, g, b = colorsys.hsv_to_rgb(hue, 1.0, 1.0)
+    return (int(r * 255), int(g * 255), int(b * 255))
+
+
+class SpriteAtlas:
+    """Cell sprites for one cell size, rendered once.
+
+    Solid blocks (segments, fruit, Mega Fruit cores) are colour-keyed
+    copies of the rounded rects the layers used to draw, pixel for pixel.
+    Glow halos are per-pixel alpha and exist once per hue bucket; they are
+    meant to be combined with ``BLEND_RGBA_MAX`` so overlapping halos keep
+    a single alpha, as when they were drawn onto one surface.
+    """
+
+    def __init__(self, cell_size: int, hue_buckets: int = HUE_BUCKETS, rounded: bool = True):
+        self.cell_size = cell_size
+        self.hue_buckets = hue_buckets
+        self.rounded = rounded  # square blocks blit and scale the same, but skip the corner work
+        self._blocks: dict[tuple, pygame.Surface] = {}
+        self._strips: dict[tuple[bool, int], pygame.Surface] = {}
+        self.segment = self.block(SNAKE_COLOR, 2, 5)
+        self.head = self.block(SNAKE_HEAD_COLOR, 2, 5)
+        hues = [rainbow(i / hue_buckets) for i in range(hue_buckets)]
+        # Snake glow: one ring 4px out; Mega Fruit: rings 5px and 2px out
+        self.snake_glow = [self._halo(color, 12, ((8, 80),)) for color in hues]
+        self.special_glow = [self._halo(color, 10, ((10, 60), (4, 100))) for color in hues]
+        self.special_core = [self.block(color, 2, 5) for color in hues]
+
+    def bucket(self, hue: float) -> int:
+        return int(hue * self.hue_buckets) % self.hue_buckets
+
+    def block(self, color, shrink: int, radius: int) -> pygame.Surface:
+        """Rounded rect ``shrink`` px smaller than a cell (cached per colour)."""
+        if not self.rounded:
+            radius = 0
+        key = (tuple(color), shrink, radius)
+        surf = self._blocks.get(key)
+        if surf is None:
+            cs = self.cell_size
+            surf = pygame.Surface((cs, cs))
+            # Any colour other than the block's own works as the key
+            colorkey = tuple(255 - c for c in color[:3])
+            surf.fill(colorkey)
+            pygame.draw.rect(surf, color, pygame.Rect(0, 0, cs, cs).inflate(-shrink, -shrink), border_radius=radius)
+            surf.set_colorkey(colorkey, pygame.RLEACCEL)
+            self._blocks[key] = surf
+        return surf
+
+    def strip(self, horizontal: bool, cells: int) -> pygame.Surface:
+        """``cells`` body segments in a row (or column), for one-blit runs."""
+        key = (horizontal, cells)
+        surf = self._strips.get(key)
+        if surf is None:
+            cs = self.cell_size
+            surf = pygame.Surface((cs * cells, cs) if horizontal else (cs, cs * cells))
+            colorkey = self.segment.get_colorkey()
+            surf.fill(colorkey)
+            surf.blits([(self.segment, (i * cs, 0) if horizontal else (0, i * cs)) for i in range(cells)],
+                       doreturn=False)
+            surf.set_colorkey(colorkey, pygame.RLEACCEL)
+            self._strips[key] = surf
+        return surf
+
+    def _halo(self, color, radius: int, rings: tuple[tuple[int, int], ...]) -> pygame.Surface:
+        # Rings are (grow, alpha), outermost first; the sprite is the size of
+        # the outermost ring and is blitted at cell.topleft - grow // 2
+        grow = rings[0][0]
+        size = self.cell_size + grow
+        if not self.rounded:
+            radius = 0
+        surf = pygame.Surface((size, size), pygame.SRCALPHA)
+        for ring_grow, alpha in rings:
+            rect = pygame.Rect(0, 0, size, size).inflate(ring_grow - grow, ring_grow - grow)
+            pygame.draw.rect(surf, (*color, alpha), rect, border_radius=radius)
+        return surf
+
+
+def cell_rect(x: int, y: int) -> pygame.Rect:
+    return pygame.Rect(BOARD_OFFSET + x * CELL_SIZE, BOARD_OFFSET + y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
+
+
+def build_background(grid_size: int = GRID_SIZE, grid_lines: bool = True) -> pygame.Surface:
+    surface = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE))
+    surface.fill(DARK)
+    if not grid_lines:
+        return surface
+    # Optional subtle grid (centered)
+    for i in range(grid_size + 1):
+        x = BOARD_OFFSET + i * CELL_SIZE
+        y = BOARD_OFFSET + i * CELL_SIZE
+        pygame.draw.line(surface, GRID_COLOR, (x, BOARD_OFFSET), (x, BOARD_OFFSET + BOARD_PIXELS), 1)
+        pygame.draw.line(surface, GRID_COLOR, (BOARD_OFFSET, y), (BOARD_OFFSET + BOARD_PIXELS, y), 1)
+    return surface
+
+
+class BoardRenderer:
+    cell_size = CELL_SIZE
+    # Levels this renderer can step through (see set_quality)
+    quality_levels = QUALITY_LEVELS[:Q_HALF_RES]
+
+    def __init__(self, font: pygame.font.Font, big_font: pygame.font.Font, text: TextCache = text_cache,
+                 interpolate: bool = False):
+        self.font = font
+        self.big_font = big_font
+        self.text = text
+        # Slide the head and tail between cells instead of snapping per step
+        self.interpolate = interpolate
+        self.quality = 0
+        self.snake_glow = self.special_glow = self.grid_lines = True
+        self._atlases: dict[bool, SpriteAtlas] = {}
+        self._use_atlas(rounded=True)
+        self._scratch: pygame.Surface | None = None
+        self._over_overlay: pygame.Surface | None = None
+        self.background = self._build_background()
+        self.turbo_label = text.render(font, "TURBO", True, WHITE)
+        self.turbo_label_pos = (TURBO_BAR.x - 90, TURBO_BAR.y - 2)
+        self.invalidate()
+
+    def _build_background(self) -> pygame.Surface:
+        return build_background(grid_lines=self.grid_lines)
+
+    def _use_atlas(self, rounded: bool):
+        atlas = self._atlases.get(rounded)
+        if atlas is None:
+            atlas = self._atlases[rounded] = SpriteAtlas(self.cell_size, rounded=rounded)
+        self.atlas = atlas
+
+    def invalidate(self):
+        """Force a full redraw on the next frame (screen switch, expose, error)."""
+        self._game: Game | None = None
+
+    def set_quality(self, level: int):
+        """Switch to effect level ``level`` (0 = full, see ``QUALITY_LEVELS``)."""
+        level = max(0, min(level, len(self.quality_levels) - 1))
+        if level == self.quality:
+            return
+        self.quality = level
+        self.snake_glow = level < Q_LITE_GLOW
+        self.special_glow = level < Q_NO_GLOW
+        self._use_atlas(rounded=level < Q_SQUARE)
+        grid_lines = level < Q_NO_GRID
+        if grid_lines != self.grid_lines:
+            self.grid_lines = grid_lines
+            self.background = self._build_background()
+        self.invalidate()
+
+    # ----------------------------
+    # Layers
+    # ----------------------------
+    def _fruit_rect(self, game: Game) -> pygame.Rect | None:
+        fruit = game.fruit
+        # Only if visible; none once the board is full
+        if fruit is None or not (0 <= fruit.x < game.grid_size and 0 <= fruit.y < game.grid_size):
+            return None
+        return cell_rect(fruit.x, fruit.y)
+
+    def _special_cells(self, game: Game) -> list[pygame.Rect]:
+        return [cell_rect(c.x, c.y) for c in game.special_cells]
+
+    def _special_rect(self, game: Game) -> pygame.Rect | None:
+        if not game.special_active:
+            return None
+        # Core cells plus the widest glow ring around them
+        cells = self._special_cells(game)
+        return cells[0].unionall(cells[1:]).inflate(10, 10)
+
+    # Layer helpers take screen-space cell rects so every renderer shares them
+    def _draw_fruit(self, surface: pygame.Surface, color, rect: pygame.Rect):
+        surface.blit(self.atlas.block(color, 4, 4), rect.topleft)
+
+    def _composite_glow(self, surface: pygame.Surface, sprite: pygame.Surface, cells, area: pygame.Rect | None = None):
+        # Halos are merged (alpha max) on a reused scratch layer, then only
+        # their bounding box is blended onto the frame
+        off = (sprite.get_width() - self.atlas.cell_size) // 2
+        dests = [(cell.x - off, cell.y - off) for cell in cells]
+        if not dests:
+            return
+        if area is None:
+            xs = [x for x, _ in dests]
+            ys = [y for _, y in dests]
+            area = pygame.Rect(min(xs), min(ys), max(xs) - min(xs) + sprite.get_width(),
+                               max(ys) - min(ys) + sprite.get_height())
+        if self._scratch is None or self._scratch.get_size() != surface.get_size():
+            self._scratch = pygame.Surface(surface.get_size(), pygame.SRCALPHA)
+        scratch = self._scratch
+        area = area.clip(scratch.get_rect())
+        scratch.fill((0, 0, 0, 0), area)
+        scratch.blits([(sprite, dest, None, pygame.BLEND_RGBA_MAX) for dest in dests], doreturn=False)
+        surface.blit(scratch, area.topleft, area)
+
+    def _draw_special(self, surface: pygame.Surface, cells: list[pygame.Rect], area: pygame.Rect, now_ms: int):
+        # Rainbow glow composited only inside the special fruit's bounding box
+        bucket = self.atlas.bucket((now_ms / 1000.0 * 0.5) % 1.0)
+        if self.special_glow:
+            self._composite_glow(surface, self.atlas.special_glow[bucket], cells, area)
+        # Core cells
+        core = self.atlas.special_core[bucket]
+        surface.blits([(core, cell.topleft) for cell in cells], doreturn=False)
+
+    def _draw_snake_glow(self, surface: pygame.Surface, cells, now_ms: int):
+        bucket = self.atlas.bucket((now_ms / 1000.0) % 1.0)
+        self._composite_glow(surface, self.atlas.snake_glow[bucket], cells)
+
+    def _segment_sprite(self, head: bool, color=None) -> pygame.Surface:
+        if color is not None:
+            return self.atlas.block(color, 2, 5)
+        return self.atlas.head if head else self.atlas.segment
+
+    def _draw_segment(self, surface: pygame.Surface, rect: pygame.Rect, head: bool, color=None):
+        surface.blit(self._segment_sprite(head, color), rect.topleft)
+
+    def _run_blits(self, body: RunBody, view: tuple[int, int, int, int], cols: int, rows: int) -> list[tuple]:
+        """One strip blit per straight run of the body, head cell left out.
+
+        ``view`` is the first visible column/row and the pixel position of
+        that cell; cells map to view columns ``(x - c0) % grid``, so runs are
+        split where they cross the wrap seam and clipped to the ``cols`` x
+        ``rows`` cells on screen.
+        """
+        c0, r0, ox, oy = view
+        grid = body.grid_size
+        cs = self.atlas.cell_size
+        horizontal = self.atlas.strip(True, cols)
+        vertical = self.atlas.strip(False, rows)
+        blits = []
+        last = len(body.runs) - 1
+        for k, (x, y, dx, dy, n) in enumerate(body.runs):
+            if k == last:
+                n -= 1  # the head is drawn on its own
+                if n == 0:
+                    break
+            if dx < 0 or dy < 0:
+                # Walk every run left-to-right / top-down from its far end
+                x, y = (x + dx * (n - 1)) % grid, (y + dy * (n - 1)) % grid
+            along_x = dy == 0
+            a = (x - c0) % grid if along_x else (y - r0) % grid
+            b = (y - r0) % grid if along_x else (x - c0) % grid
+            length, width = (cols, rows) if along_x else (rows, cols)
+            if b >= width:
+                continue
+            for start, end in ((a, min(a + n, grid)), (0, a + n - grid)):
+                lo, hi = start, min(end, length)
+                if lo >= hi:
+                    continue
+                if along_x:
+                    blits.append((horizontal, (ox + lo * cs, oy + b * cs), (0, 0, (hi - lo) * cs, cs)))
+                else:
+                    blits.append((vertical, (ox + b * cs, oy + lo * cs), (0, 0, cs, (hi - lo) * cs)))
+        return blits
+
+    def _motion(self, game: Game, now_ms: int, to_rect=cell_rect) -> list[tuple[pygame.Rect, pygame.Rect, bool]]:
+        """Interpolated (sprite, span, is_head) for the head and vacated tail."""
+        if not self.interpolate or game.game_over:
+            return []
+        snake = game.snake
+        alpha = game.step_progress(now_ms)
+        moves = []
+        if len(snake.body) > 1:
+            moves.append((snake.body[-2], snake.head, True))
+        if snake.vacated is not None:
+            moves.append((snake.vacated, snake.body[0], False))
+        out = []
+        for a, b, head in moves:
+            if abs(a.x - b.x) + abs(a.y - b.y) != 1:
+                continue  # wrapped across a seam: snap
+            ra, rb = to_rect(a.x, a.y), to_rect(b.x, b.y)
+            if ra is None or rb is None:
+                continue  # off screen
+            sprite = pygame.Rect(round(ra.x + (rb.x - ra.x) * alpha), round(ra.y + (rb.y - ra.y) * alpha), ra.w, ra.h)
+            out.append((sprite, ra.union(rb), head))
+        return out
+
+    def _turbo_fill(self, game: Game, now_ms: int) -> tuple[int, tuple[int, int, int]]:
+        bar_w = TURBO_BAR.width
+        if game.turbo_active:
+            # Show duration remaining
+            elapsed = now_ms - game.turbo_last_used_ms
+            ratio = max(0.0, 1.0 - (elapsed / game.turbo_duration_ms))
+            return int(bar_w * ratio), (255, 100, 80)
+        since = now_ms - game.turbo_last_used_ms
+        ratio = min(1.0, since / game.turbo_cooldown_ms) if game.turbo_last_used_ms > 0 else 1.0
+        color = (90, 200, 120) if ratio >= 1.0 else (120, 170, 255)
+        return int(bar_w * ratio), color
+
+    def _draw_hud(self, surface: pygame.Surface):
+        surface.blit(self._score_surf, SCORE_POS)
+        pygame.draw.rect(surface, (60, 60, 60), TURBO_BAR, border_radius=6)
+        fill_w, color = self._turbo
+        pygame.draw.rect(surface, color, pygame.Rect(TURBO_BAR.x, TURBO_BAR.y, fill_w, TURBO_BAR.height), border_radius=6)
+        surface.blit(self.turbo_label, self.turbo_label_pos)
+
+    def _draw_game_over(self, surface: pygame.Surface, game: Game):
+        if self._over_overlay is None:
+            self._over_overlay = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE), pygame.SRCALPHA)
+            self._over_overlay.fill((0, 0, 0, 140))
+        surface.blit(self._over_overlay, (0, 0))
+        msg = self.text.render(self.big_font, "You Win!" if game.won else "Game Over", True, WHITE)
+        sub = self.text.render(self.font, "Press R to restart", True, WHITE)
+        rect = msg.get_rect(center=(WINDOW_SIZE // 2, WINDOW_SIZE // 2 - 10))
+        surface.blit(msg, rect)
+        sub_rect = sub.get_rect(center=(WINDOW_SIZE // 2, WINDOW_SIZE // 2 + 24))
+        surface.blit(sub, sub_rect)
+
+    # ----------------------------
+    # Frame
+    # ----------------------------
+    def _sync_hud(self, game: Game, now_ms: int, full: bool):
+        if full or game.score != self._score:
+            self._score = game.score
+            self._score_surf = self.text.render(self.font, f"Score: {game.score}", True, WHITE)
+            self._score_rect = self._score_surf.get_rect(topleft=SCORE_POS)
+        self._turbo = self._turbo_fill(game, now_ms)
+
+    def _sync(self, game: Game, now_ms: int, full: bool):
+        # Remember what is on screen so the next frame can diff against it
+        self._sync_hud(game, now_ms, full)
+        self._fruit = self._fruit_rect(game)
+        self._fruit_color = game.fruit_color
+        self._special = self._special_rect(game)
+
+    def _repaint(self, surface: pygame.Surface, game: Game, area: pygame.Rect, now_ms: int):
+        # Rebuild every layer inside one dirty rectangle
+        surface.set_clip(area)
+        surface.blit(self.background, area, area)
+        if self._fruit is not None and self._fruit.colliderect(area):
+            self._draw_fruit(surface, game.fruit_color, self._fruit)
+        if self._special is not None and self._special.colliderect(area):
+            self._draw_special(surface, self._special_cells(game), self._special, now_ms)
+        snake = game.snake
+        head = snake.head
+        # An interpolated head is drawn as a sprite below, not in its cell
+        head_sprite = any(is_head for _, _, is_head in self._moving)
+        x0 = max(0, (area.left - BOARD_OFFSET) // CELL_SIZE)
+        x1 = min(game.grid_size - 1, (area.right - 1 - BOARD_OFFSET) // CELL_SIZE)
+        y0 = max(0, (area.top - BOARD_OFFSET) // CELL_SIZE)
+        y1 = min(game.grid_size - 1, (area.bottom - 1 - BOARD_OFFSET) // CELL_SIZE)
+        for y in range(y0, y1 + 1):
+            for x in range(x0, x1 + 1):
+                if snake.occupies(x, y):
+                    is_head = head.x == x and head.y == y
+                    if not (is_head and head_sprite):
+                        self._draw_segment(surface, cell_rect(x, y), is_head)
+        for sprite, span, is_head in self._moving:
+            if span.colliderect(area):
+                self._draw_segment(surface, sprite, is_head)
+        self._draw_hud(surface)
+        surface.set_clip(None)
+
+    def _draw_full(self, surface: pygame.Surface, game: Game, now_ms: int, glow: bool) -> list[pygame.Rect]:
+        self._sync(game, now_ms, full=True)
+        self._moving = self._motion(game, now_ms)
+        head_sprite = any(is_head for _, _, is_head in self._moving)
+        surface.blit(self.background, (0, 0))
+        if self._fruit is not None:
+            self._draw_fruit(surface, game.fruit_color, self._fruit)
+        if self._special is not None:
+            self._draw_special(surface, self._special_cells(game), self._special, now_ms)
+        # Snake glow if active (after special fruit)
+        body = game.snake.body
+        if glow:
+            self._draw_snake_glow(surface, (cell_rect(seg.x, seg.y) for seg in body), now_ms)
+        if isinstance(body, RunBody):
+            grid = game.grid_size
+            surface.blits(self._run_blits(body, (0, 0, BOARD_OFFSET, BOARD_OFFSET), grid, grid), doreturn=False)
+            if not head_sprite:
+                self._draw_segment(surface, cell_rect(*body[-1]), True)
+        else:
+            segment = self.atlas.segment
+            cells = [(segment, (BOARD_OFFSET + seg.x * CELL_SIZE, BOARD_OFFSET + seg.y * CELL_SIZE)) for seg in body]
+            if cells:
+                if head_sprite:
+                    cells.pop()
+                else:
+                    cells[-1] = (self.atlas.head, cells[-1][1])
+            surface.blits(cells, doreturn=False)
+        for sprite, _, is_head in self._moving:
+            self._draw_segment(surface, sprite, is_head)
+        self._draw_hud(surface)
+        if game.game_over:
+            self._draw_game_over(surface, game)
+
+        self._game = game
+        self._glowing = glow
+        self._over_drawn = game.game_over
+        self._moves = game.snake.moves
+        self._drawn = deque(body)
+        return [surface.get_rect()]
+
+    def draw(self, surface: pygame.Surface, game: Game) -> list[pygame.Rect]:
+        """Draw the board and return the screen rectangles that changed."""
+        if self._game is game and self._over_drawn:
+            # Overlay is up and nothing underneath changes any more
+            return []
+        now_ms = game.clock()
+        glow = self.snake_glow and now_ms < game.snake_glow_until_ms
+        snake = game.snake
+        if self._game is not game or game.game_over or glow or self._glowing:
+            return self._draw_full(surface, game, now_ms, glow)
+        moved = snake.moves - self._moves
+        if not 0 <= moved <= len(snake.body):
+            return self._draw_full(surface, game, now_ms, glow)
+
+        old_score, old_score_rect, old_turbo = self._score, self._score_rect, self._turbo
+        old_fruit, old_fruit_color, old_special = self._fruit, self._fruit_color, self._special
+        self._sync(game, now_ms, full=False)
+        dirty: list[pygame.Rect] = []
+
+        # Interpolated head/tail: clear last frame's spans, draw this frame's
+        old_moving = self._moving
+        self._moving = self._motion(game, now_ms)
+        dirty.extend(span for _, span, _ in old_moving)
+        dirty.extend(span for _, span, _ in self._moving)
+
+        # Snake: new heads, the old head (now body colored), vacated tails
+        if moved:
+            drawn = self._drawn
+            dirty.append(cell_rect(*drawn[-1]))
+            for i in range(moved, 0, -1):
+                cell = snake.body[-i]
+                drawn.append(cell)
+                dirty.append(cell_rect(cell.x, cell.y))
+            while len(drawn) > len(snake.body):
+                dirty.append(cell_rect(*drawn.popleft()))
+            self._moves = snake.moves
+
+        if old_fruit != self._fruit or old_fruit_color != game.fruit_color:
+            dirty.extend(r for r in (old_fruit, self._fruit) if r is not None)
+        # The special fruit animates every frame while it is up
+        dirty.extend(r for r in (old_special, self._special) if r is not None)
+        if game.score != old_score:
+            dirty.append(old_score_rect.union(self._score_rect))
+        if self._turbo != old_turbo:
+            dirty.append(TURBO_BAR)
+
+        for area in dirty:
+            self._repaint(surface, game, area, now_ms)
+        return dirty
+
+
+class CameraRenderer(BoardRenderer):
+    """Scrolling view for boards larger than the window.
+
+    The camera keeps the head centred and each frame scans only the cells
+    inside the viewport, so the cost depends on the window and cell size, not
+    on the board size or the snake length. Board coordinates are taken modulo
+    the grid size, so the wrap-around seams scroll past like any other cell
+    boundary.
+
+    At the lowest quality level the view is drawn by a half-cell-size copy of
+    the renderer into a half-size surface and scaled up; the HUD stays sharp.
+    """
+
+    quality_levels = QUALITY_LEVELS
+
+    def __init__(self, font: pygame.font.Font, big_font: pygame.font.Font, grid_size: int,
+                 cell_size: int = 16, view_size: tuple[int, int] = (WINDOW_SIZE, WINDOW_SIZE),
+                 text: TextCache = text_cache, interpolate: bool = False):
+        self.grid_size = grid_size
+        self.cell_size = cell_size
+        self.view_w, self.view_h = view_size
+        # One spare column/row for the partially visible cells at the edges,
+        # but never more than the board itself (no duplicated cells)
+        self.cols = min(self.view_w // cell_size + 2, grid_size)
+        self.rows = min(self.view_h // cell_size + 2, grid_size)
+        self._low: CameraRenderer | None = None
+        self._low_surface: pygame.Surface | None = None
+        super().__init__(font, big_font, text, interpolate)
+
+    def _build_background(self) -> pygame.Surface:
+        cs = self.cell_size
+        tile = pygame.Surface((self.cols * cs, self.rows * cs))
+        tile.fill(DARK)
+        if not self.grid_lines:
+            return tile
+        for i in range(self.cols + 1):
+            pygame.draw.line(tile, GRID_COLOR, (i * cs, 0), (i * cs, self.rows * cs), 1)
+        for j in range(self.rows + 1):
+            pygame.draw.line(tile, GRID_COLOR, (0, j * cs), (self.cols * cs, j * cs), 1)
+        return tile
+
+    def set_quality(self, level: int):
+        super().set_quality(level)
+        if self.quality >= Q_HALF_RES and self.cell_size >= 4:
+            if self._low is None:
+                self._low = type(self)(self.font, self.big_font, self.grid_size, self.cell_size // 2,
+                                       (self.view_w // 2, self.view_h // 2), self.text, self.interpolate)
+                self._low_surface = pygame.Surface((self.view_w // 2, self.view_h // 2))
+            self._low.set_quality(Q_HALF_RES - 1)
+        else:
+            self._low = self._low_surface = None
+
+    def _camera(self, game: Game, now_ms: int | None = None) -> tuple[int, int, int, int]:
+        # First visible column/row and the pixel offset of that cell
+        cs = self.cell_size
+        snake = game.snake
+        head = snake.head
+        hx, hy = head.x * cs, head.y * cs
+        if self.interpolate and now_ms is not None and len(snake.body) > 1 and not game.game_over:
+            # Glide with the head; the wrap-aware step direction is the unit
+            # move that led here, so the seam needs no special casing
+            back = (1.0 - game.step_progress(now_ms)) * cs
+            hx -= round(snake.direction.x * back)
+            hy -= round(snake.direction.y * back)
+        cam_x = hx + cs // 2 - self.view_w // 2
+        cam_y = hy + cs // 2 - self.view_h // 2
+        c0, r0 = cam_x // cs, cam_y // cs
+        return c0, r0, c0 * cs - cam_x, r0 * cs - cam_y
+
+    def _to_screen(self, x: int, y: int, camera: tuple[int, int, int, int]) -> pygame.Rect | None:
+        c0, r0, ox, oy = camera
+        i = (x - c0) % self.grid_size
+        j = (y - r0) % self.grid_size
+        if i >= self.cols or j >= self.rows:
+            return None
+        cs = self.cell_size
+        return pygame.Rect(ox + i * cs, oy + j * cs, cs, cs)
+
+    def draw(self, surface: pygame.Surface, game: Game) -> list[pygame.Rect]:
+        """Draw the viewport around the head; the whole window changes."""
+        now_ms = game.clock()
+        self._sync_hud(game, now_ms, full=self._game is not game)
+        if self._low is not None:
+            self._low._draw_view(self._low_surface, game, now_ms)
+            pygame.transform.scale(self._low_surface, surface.get_size(), surface)
+        else:
+            self._draw_view(surface, game, now_ms)
+        self._draw_hud(surface)
+        if game.game_over:
+            self._draw_game_over(surface, game)
+        self._game = game
+        return [surface.get_rect()]
+
+    def _draw_view(self, surface: pygame.Surface, game: Game, now_ms: int):
+        camera = c0, r0, ox, oy = self._camera(game, now_ms)
+        moving = self._motion(game, now_ms, lambda x, y: self._to_screen(x, y, camera))
+
+        if self.cols * self.cell_size < self.view_w + self.cell_size or \
+                self.rows * self.cell_size < self.view_h + self.cell_size:
+            surface.fill(DARK)
+        surface.blit(self.background, (ox, oy))
+
+        fruit = game.fruit
+        if fruit is not None:
+            rect = self._to_screen(fruit.x, fruit.y, camera)
+            if rect is not None:
+                self._draw_fruit(surface, game.fruit_color, rect)
+        if game.special_active:
+            cells = [r for r in (self._to_screen(c.x, c.y, camera) for c in game.special_cells) if r is not None]
+            if cells:
+                self._draw_special(surface, cells, cells[0].unionall(cells[1:]).inflate(10, 10), now_ms)
+
+        # Visible snake cells: scan the viewport, never the body (a run body
+        # is drawn run by run instead, unless the glow needs every cell)
+        body = game.snake.body
+        runs = isinstance(body, RunBody)
+        glow = self.snake_glow and now_ms < game.snake_glow_until_ms
+        segments = []
+        if glow or not runs:
+            cs = self.cell_size
+            grid = self.grid_size
+            occupancy = game.snake.occupancy
+            xs = [(c0 + i) % grid for i in range(self.cols)]
+            for j in range(self.rows):
+                base = ((r0 + j) % grid) * grid
+                sy = oy + j * cs
+                for i, x in enumerate(xs):
+                    if occupancy[base + x]:
+                        segments.append(pygame.Rect(ox + i * cs, sy, cs, cs))
+        # Snake glow if active (after special fruit)
+        if glow:
+            self._draw_snake_glow(surface, segments, now_ms)
+        head = game.snake.head
+        head_rect = self._to_screen(head.x, head.y, camera)
+        head_sprite = any(is_head for _, _, is_head in moving)
+        if runs:
+            surface.blits(self._run_blits(body, camera, self.cols, self.rows), doreturn=False)
+        else:
+            segment = self.atlas.segment
+            surface.blits([(segment, rect.topleft) for rect in segments if not (head_sprite and rect == head_rect)],
+                          doreturn=False)
+        for sprite, _, is_head in moving:
+            self._draw_segment(surface, sprite, is_head)
+        if head_rect is not None and not head_sprite:
+            self._draw_segment(surface, head_rect, True)
+
+
+class ArenaRenderer(CameraRenderer):
+    """Camera view of a multi-snake arena.
+
+    Same viewport scan as the camera renderer, but over the arena's shared
+    owner grid: each visible cell is coloured by the id of the snake on it.
+    """
+
+    BOT_COLORS = [rainbow(i / 12) for i in range(12)]
+
+    def _use_atlas(self, rounded: bool):
+        super()._use_atlas(rounded)
+        self._bot_sprites = [self.atlas.block(color, 2, 5) for color in self.BOT_COLORS]
+        self._fruit_sprites = [self.atlas.block(color, 4, 4) for color in FRUIT_COLORS]
+
+    def _sync_hud(self, arena: Arena, now_ms: int, full: bool):
+        alive = arena.alive_count()
+        if full or arena.score != self._score or alive != self._alive:
+            self._score = arena.score
+            self._alive = alive
+            self._score_surf = self.text.render(self.font, f"Score: {arena.score}   Snakes: {alive}", True, WHITE)
+
+    def _draw_hud(self, surface: pygame.Surface):
+        surface.blit(self._score_surf, SCORE_POS)
+
+    def _draw_view(self, surface: pygame.Surface, arena: Arena, now_ms: int):
+        camera = c0, r0, ox, oy = self._camera(arena)
+        if self.cols * self.cell_size < self.view_w + self.cell_size or \
+                self.rows * self.cell_size < self.view_h + self.cell_size:
+            surface.fill(DARK)
+        surface.blit(self.background, (ox, oy))
+
+        cs = self.cell_size
+        grid = self.grid_size
+        owner = arena.owner
+        fruit = arena.fruit
+        player = arena.player.id if arena.player is not None else 0
+        xs = [(c0 + i) % grid for i in range(self.cols)]
+        bots, fruits = self._bot_sprites, self._fruit_sprites
+        n_bots = len(bots)
+        blits = []
+        for j in range(self.rows):
+            base = ((r0 + j) % grid) * grid
+            sy = oy + j * cs
+            for i, x in enumerate(xs):
+                idx = base + x
+                sid = owner[idx]
+                if sid:
+                    sprite = self.atlas.segment if sid == player else bots[sid % n_bots]
+                    blits.append((sprite, (ox + i * cs, sy)))
+                elif fruit[idx]:
+                    blits.append((fruits[fruit[idx] - 1], (ox + i * cs, sy)))
+        surface.blits(blits, doreturn=False)
+        if arena.player is not None and arena.player.alive:
+            head = arena.player.head
+            head_rect = self._to_screen(head.x, head.y, camera)
+            if head_rect is not None:
+                self._draw_segment(surface, head_rect, True)
+
+
+class ProfilerOverlay:
+    """Frame-time readout for the profiler (F3).
+
+    The panel is rebuilt a few times a second and blitted on top of whatever
+    was drawn; its numbers change constantly, so its text skips the shared
+    cache rather than churning it.
+    """
+
+    SPARK_FRAMES = 150
+    SPARK_HEIGHT = 48
+    SPARK_MAX_MS = 50.0
+
+    def __init__(self, profiler: FrameProfiler, font: pygame.font.Font, text: TextCache = text_cache,
+                 budget_ms: float = 1000.0 / 60, refresh_ms: int = 250):
+        self.profiler = profiler
+        self.font = font
+        self.text = text
+        self.budget_ms = budget_ms
+        self.refresh_ms = refresh_ms
+        self.visible = False
+        line_h = font.get_linesize()
+        self.size = (2 * self.SPARK_FRAMES + 16, 5 * line_h + self.SPARK_HEIGHT + 20)
+        self._panel = pygame.Surface(self.size)
+        self._built_ms: int | None = None
+        self._misses = text.misses
+
+    def toggle(self):
+        self.visible = not self.visible
+        self._built_ms = None
+
+    def _build(self, elapsed_ms: int):
+        prof = self.profiler
+        panel = self._panel
+        panel.fill(BLACK)
+        pygame.draw.rect(panel, (70, 70, 70), panel.get_rect(), 1)
+        s = prof.summary()
+        means = prof.section_mean_ms()
+        misses = self.text.misses - self._misses
+        self._misses = self.text.misses
+        names = prof.sections
+        lines = [
+            f"frame p50 {s['p50']:.1f}  p95 {s['p95']:.1f}  p99 {s['p99']:.1f}  max {s['max']:.1f} ms",
+            f"work  p50 {s['work_p50']:.2f}  p99 {s['work_p99']:.2f} ms  ({s['frames']} frames)",
+            "  ".join(f"{n} {m:.2f}" for n, m in zip(names[:3], means[:3])),
+            "  ".join(f"{n} {m:.2f}" for n, m in zip(names[3:], means[3:])),
+            f"text renders {misses * 1000 // max(elapsed_ms, 1)}/s  cached {len(self.text)}  "
+            f"quality {QUALITY_LEVELS[prof.quality]}",
+        ]
+        y = 6
+        for line in lines:
+            panel.blit(self.font.render(line, True, WHITE), (8, y))
+            y += self.font.get_linesize()
+
+        # Sparkline of recent frame times; red past the budget
+        base = y + 6 + self.SPARK_HEIGHT
+        scale = self.SPARK_HEIGHT / self.SPARK_MAX_MS
+        budget_y = base - round(self.budget_ms * scale)
+        pygame.draw.line(panel, (90, 90, 90), (8, budget_y), (self.size[0] - 8, budget_y))
+        for i, ms in enumerate(prof.frame_ms(self.SPARK_FRAMES)):
+            h = max(1, min(self.SPARK_HEIGHT, round(ms * scale)))
+            color = (235, 64, 52) if ms > self.budget_ms * 1.5 else (60, 205, 120)
+            pygame.draw.line(panel, color, (8 + 2 * i, base), (8 + 2 * i, base - h))
+
+    def draw(self, surface: pygame.Surface, now_ms: int) -> pygame.Rect:
+        """Blit the panel in the bottom-left corner and return its rect."""
+        if self._built_ms is None:
+            self._misses = self.text.misses
+            self._build(self.refresh_ms)
+            self._built_ms = now_ms
+        elif now_ms - self._built_ms >= self.refresh_ms:
+            self._build(now_ms - self._built_ms)
+            self._built_ms = now_ms
+        rect = self._panel.get_rect(bottomleft=(10, surface.get_height() - 10))
+        surface.blit(self._panel, rect)
+        return rect
@@ -0,0 +1,226 @@
+"""Compact replays and headless verification.
+
+A game is fully described by its seed, the board size and the inputs the
+player made (steer/turbo, plus the rare catch-up resync), each stamped with
+the step ("tick") it happened before. The file is a fixed header followed by
+one varint per event holding ``tick_delta << 3 | kind``, with a second varint
+of milliseconds for turbo/resync. A typical game is a few hundred bytes.
+
+Replaying runs the simulation core on its fixed timeline with no clock, no
+display and no sleeping, so a file can be checked in well under a
+millisecond per hundred steps::
+
+    python replay.py verify replays/*.snkr
+"""
+import argparse
+import os
+import struct
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+from multiprocessing import Pool
+
+from snake_core import DIRECTIONS, INPUT_RESYNC, INPUT_TURBO, Game, ManualClock
+
+MAGIC = b"SNKR"
+VERSION = 1
+# magic, version, grid size, seed, ticks played, claimed score
+HEADER = struct.Struct("<4sBHQII")
+
+
+@dataclass
+class Replay:
+    seed: int
+    grid_size: int
+    ticks: int
+    score: int
+    inputs: list[tuple[int, int, int]]
+
+
+@dataclass
+class Verdict:
+    path: str
+    claimed: int
+    score: int
+    ticks: int
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.claimed == self.score
+
+
+# ----------------------------
+# Encoding
+# ----------------------------
+def put_varint(out: bytearray, n: int):
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def get_varint(data: bytes, pos: int) -> tuple[int, int]:
+    n = shift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+
+def encode_inputs(out: bytearray, inputs: list[tuple[int, int, int]]):
+    last_tick = 0
+    for tick, kind, value in inputs:
+        put_varint(out, (tick - last_tick) << 3 | kind)
+        if kind in (INPUT_TURBO, INPUT_RESYNC):
+            put_varint(out, value)
+        last_tick = tick
+
+
+def decode_inputs(data: bytes, pos: int) -> list[tuple[int, int, int]]:
+    """Input log from ``pos`` to the end of ``data``."""
+    inputs = []
+    tick = 0
+    while pos < len(data):
+        word, pos = get_varint(data, pos)
+        tick += word >> 3
+        kind = word & 7
+        value = 0
+        if kind in (INPUT_TURBO, INPUT_RESYNC):
+            value, pos = get_varint(data, pos)
+        inputs.append((tick, kind, value))
+    return inputs
+
+
+def encode(replay: Replay) -> bytes:
+    out = bytearray(HEADER.pack(MAGIC, VERSION, replay.grid_size, replay.seed, replay.ticks, replay.score))
+    encode_inputs(out, replay.inputs)
+    return bytes(out)
+
+
+def decode(data: bytes) -> Replay:
+    magic, version, grid_size, seed, ticks, score = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a snake replay (or unsupported version)")
+    return Replay(seed, grid_size, ticks, score, decode_inputs(data, HEADER.size))
+
+
+def from_game(game: Game) -> Replay:
+    """Snapshot a recording game (``Game(record=True)``) as a replay."""
+    if game.inputs is None or game.seed is None:
+        raise ValueError("game was not recorded with a seed")
+    return Replay(game.seed, game.grid_size, game.snake.moves, game.score, list(game.inputs))
+
+
+# ----------------------------
+# Simulation
+# ----------------------------
+def steps(replay: Replay, game: Game) -> Iterator[int]:
+    """Play ``replay`` on ``game`` one logic step per resume.
+
+    Before each step the inputs stamped with the current tick are applied and
+    the time the step is due (on the game's timeline) is yielded; resuming
+    takes the step. Ends at game over or after the replay's ticks.
+    """
+    snake = game.snake
+    inputs = replay.inputs
+    i = 0
+    while not game.game_over and snake.moves < replay.ticks:
+        while i < len(inputs) and inputs[i][0] <= snake.moves:
+            _, kind, value = inputs[i]
+            if kind == INPUT_TURBO:
+                game.activate_turbo(game.last_step_ms + value)
+            elif kind == INPUT_RESYNC:
+                game.last_step_ms += value
+            else:
+                snake.set_direction(*DIRECTIONS[kind])
+            i += 1
+        yield game.last_step_ms + game.step_interval_ms()
+        game.advance()
+
+
+def simulate(replay: Replay) -> Game:
+    """Re-run a replay headless and return the finished game."""
+    game = Game(clock=ManualClock(0), seed=replay.seed, grid_size=replay.grid_size)
+    for _ in steps(replay, game):
+        pass
+    return game
+
+
+def verify_bytes(data: bytes, path: str = "<memory>") -> Verdict:
+    try:
+        replay = decode(data)
+        game = simulate(replay)
+    except Exception as e:
+        return Verdict(path, -1, -1, 0, f"{type(e).__name__}: {e}")
+    error = None
+    if game.snake.moves != replay.ticks:
+        error = f"ended after {game.snake.moves} of {replay.ticks} ticks"
+    return Verdict(path, replay.score, game.score, game.snake.moves, error)
+
+
+def verify_file(path: str) -> Verdict:
+    with open(path, "rb") as f:
+        return verify_bytes(f.read(), path)
+
+
+# ----------------------------
+# Saving from the game loop
+# ----------------------------
+def save_async(path: str, replay: Replay):
+    """Write a replay from a short-lived thread so the frame never waits."""
+    data = encode(replay)
+
+    def write():
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            pass
+
+    threading.Thread(target=write, name="replay-writer", daemon=True).start()
+
+
+# ----------------------------
+# CLI
+# ----------------------------
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Snake replay tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    verify = sub.add_parser("verify", help="replay files and check their claimed scores")
+    verify.add_argument("files", nargs="+")
+    verify.add_argument("--jobs", type=int, default=1, help="worker processes")
+    verify.add_argument("--quiet", action="store_true", help="only report rejected replays")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.jobs > 1:
+        with Pool(args.jobs) as pool:
+            verdicts = pool.map(verify_file, args.files, chunksize=64)
+    else:
+        verdicts = [verify_file(p) for p in args.files]
+    elapsed = time.perf_counter() - start
+
+    rejected = 0
+    for v in verdicts:
+        if not v.ok:
+            rejected += 1
+            reason = v.error or f"claimed {v.claimed}, replay scores {v.score}"
+            print(f"REJECT {v.path}: {reason}")
+        elif not args.quiet:
+            print(f"ok     {v.path}: score {v.score} in {v.ticks} ticks")
+    rate = len(verdicts) / elapsed if elapsed > 0 else float("inf")
+    print(f"{len(verdicts)} replays, {rejected} rejected, {rate:.0f} games/s")
+    return 1 if rejected else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
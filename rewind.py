@@ -0,0 +1,482 @@
+"""Rewind buffer for practice mode, and save/resume of a game in progress.
+
+The buffer keeps the last ``seconds`` of a ``Game`` as blocks: a keyframe
+(the whole state, encoded compactly) followed by one small delta per tick.
+A delta holds the head cell added, how many 32-bit words the tick drew from
+the RNG and the difference of every scalar that changed (score, fruit,
+timers, ...); the tail that moved out follows from ``growth_pending``, so it
+is not stored. A typical tick costs a handful of bytes, whatever the length
+of the snake.
+
+Seeking restores the keyframe at or before the target and plays the deltas
+forward. The RNG is not copied per tick: Python's Mersenne Twister hands
+out its state one 32-bit word at a time, so drawing the recorded number of
+words from the keyframe's state lands exactly where the game was, and a
+resumed game continues with the same fruit rolls and replays verify. Whole
+blocks fall off the old end, so memory is bounded by the capacity plus one
+block.
+
+Keyframes also hold the order of the free-cell index: fruit placement draws
+a position in that index, so the order is game state. Only the entries that
+moved away from the starting order are stored (delta coded and zlib packed),
+so a keyframe costs the snake plus the cells play has touched, never the
+board area. Deltas replay the same pushes and pops as ``Snake.step``, which
+keeps it in step from there.
+
+Save/resume uses the same keyframe encoding plus the input log, so an
+interrupted game picks up exactly where it stopped.
+"""
+import operator
+import os
+import struct
+import threading
+import zlib
+from array import array
+from bisect import bisect_right
+from collections import deque
+from itertools import accumulate
+
+from replay import decode_inputs, encode_inputs, get_varint, put_varint
+from snake_core import DIRECTIONS, FPS, FRUIT_TYPES, Clock, Game, Point, RunBody
+
+REWIND_SECONDS = 45  # history kept by default
+KEYFRAME_TICKS = 64  # ticks per block; smaller seeks faster, costs more memory
+
+MAGIC = b"SNKS"
+VERSION = 3
+# magic, version, mode, grid size, seed (0 when none), flags
+HEADER = struct.Struct("<4sBBHQB")
+MODE_SINGLE = 0  # saves hold single-player games (an arena would store its snake count)
+FLAG_SEED = 1
+FLAG_RECORD = 2
+FLAG_RUNS = 4
+FLAG_PRACTICE = 8  # played with rewind on; must not continue into a scored session
+
+_FRUIT_INDEX = {f["name"]: i for i, f in enumerate(FRUIT_TYPES)}
+_MT_WORDS = 624  # Mersenne Twister state size
+_INPUTS = 16  # index of the input-log length in the scalar list
+
+
+class ShiftedClock:
+    """``base() + offset``: a game's own timeline on top of a shared clock.
+
+    Resuming (after a rewind or from a save) moves the game's clock back to
+    its last step instead of moving the game forward to the wall clock, so
+    timers such as the Mega Fruit's keep the time they had left.
+    """
+
+    def __init__(self, base: Clock, offset: int = 0):
+        self.base = base
+        self.offset = offset
+
+    def __call__(self) -> int:
+        return self.base() + self.offset
+
+
+def align_clock(game: Game):
+    """Point the game's clock at its last step (see ``ShiftedClock``)."""
+    base = game.clock.base if isinstance(game.clock, ShiftedClock) else game.clock
+    game.clock = ShiftedClock(base, game.last_step_ms - base())
+
+
+# ----------------------------
+# State encoding
+# ----------------------------
+def _zigzag(n: int) -> int:
+    return n * 2 if n >= 0 else -n * 2 - 1
+
+
+def _unzigzag(n: int) -> int:
+    return n >> 1 if not n & 1 else -(n >> 1) - 1
+
+
+def _cell(grid: int, p: Point | None) -> int:
+    return -1 if p is None else p.y * grid + p.x
+
+
+def _point(grid: int, idx: int) -> Point | None:
+    return None if idx < 0 else Point(idx % grid, idx // grid)
+
+
+def _scalars(game: Game) -> list[int]:
+    """Every per-tick value besides the body and the RNG, as ints."""
+    snake = game.snake
+    grid = game.grid_size
+    spawned = game.special_spawned_at_ms
+    return [
+        DIRECTIONS.index(snake.direction),
+        DIRECTIONS.index(snake.pending_direction),
+        snake.growth_pending,
+        snake.moves,
+        _cell(grid, snake.vacated),
+        game.score,
+        _cell(grid, game.fruit),
+        _FRUIT_INDEX[game.fruit_name],
+        game.special_active,
+        -1 if spawned is None else spawned,
+        game.snake_glow_until_ms,
+        game.game_over,
+        game.won,
+        game.last_step_ms,
+        game.turbo_active,
+        game.turbo_last_used_ms,
+        len(game.inputs) if game.inputs is not None else 0,  # _INPUTS
+    ]
+
+
+def _apply_scalars(game: Game, values: list[int]):
+    # The input log is left alone: seeking must not lose inputs a later
+    # seek forward would need again
+    snake = game.snake
+    grid = game.grid_size
+    (direction, pending, snake.growth_pending, snake.moves, vacated, game.score, fruit, fruit_type,
+     special, spawned, game.snake_glow_until_ms, over, won, game.last_step_ms, turbo,
+     game.turbo_last_used_ms, _) = values
+    snake.direction = Point(*DIRECTIONS[direction])
+    snake.pending_direction = Point(*DIRECTIONS[pending])
+    snake.vacated = _point(grid, vacated)
+    game.fruit = _point(grid, fruit)
+    kind = FRUIT_TYPES[fruit_type]
+    game.fruit_color, game.fruit_points, game.fruit_name = kind["color"], kind["points"], kind["name"]
+    game.special_active = bool(special)
+    game.special_spawned_at_ms = None if spawned < 0 else spawned
+    if game.special_active:
+        c = grid // 2 - 1
+        game.special_cells = [Point(c, c), Point(c + 1, c), Point(c, c + 1), Point(c + 1, c + 1)]
+    else:
+        game.special_cells = []
+    game.game_over, game.won, game.turbo_active = bool(over), bool(won), bool(turbo)
+
+
+def _body_runs(snake) -> list[tuple[int, int, int, int, int]]:
+    if isinstance(snake.body, RunBody):
+        return list(snake.body.runs)
+    grid = snake.grid_size
+    runs = []
+    for cell in snake.body:
+        if runs:
+            x, y, dx, dy, n = runs[-1]
+            sx = (cell.x - (x + dx * (n - 1)) + 1) % grid - 1
+            sy = (cell.y - (y + dy * (n - 1)) + 1) % grid - 1
+            if n == 1 or (sx, sy) == (dx, dy):
+                runs[-1] = (x, y, sx, sy, n + 1)
+                continue
+        runs.append((cell.x, cell.y, 0, 0, 1))
+    return runs
+
+
+def encode_state(game: Game) -> bytes:
+    """The whole mutable state of ``game``: scalars, body, free cells and RNG."""
+    out = bytearray()
+    for value in _scalars(game):
+        put_varint(out, _zigzag(int(value)))
+    grid = game.grid_size
+    runs = _body_runs(game.snake)
+    put_varint(out, len(runs))
+    for x, y, dx, dy, n in runs:
+        put_varint(out, y * grid + x)
+        put_varint(out, n << 2 | (DIRECTIONS.index((dx, dy)) if dx or dy else 0))
+    # Free-cell order: only the entries away from the identity, so this
+    # follows the cells play has touched, not the board area
+    free = game.snake.free_cells
+    moved = free.moved
+    positions = array("i", sorted(moved))
+    cells = array("i", map(moved.__getitem__, positions))
+    diffs = array("i", positions[:1])
+    diffs.extend(map(operator.sub, positions[1:], positions[:-1]))
+    packed = zlib.compress(diffs.tobytes() + cells.tobytes(), 1)
+    put_varint(out, free.count)
+    put_varint(out, len(positions))
+    put_varint(out, len(packed))
+    out += packed
+    version, words, gauss = game.rng.getstate()
+    out += array("I", words).tobytes()
+    out += struct.pack("<?d", gauss is not None, gauss or 0.0)
+    return bytes(out)
+
+
+def decode_state(game: Game, data: bytes, pos: int = 0) -> tuple[list[int], int]:
+    """Load ``encode_state`` output into ``game``; returns the scalars and end."""
+    values = []
+    for _ in range(_INPUTS + 1):
+        value, pos = get_varint(data, pos)
+        values.append(_unzigzag(value))
+    # Body, occupancy and free cells are rebuilt as saved rather than by
+    # pushing cells, which would reorder the free-cell index
+    snake = game.snake
+    grid = game.grid_size
+    body = RunBody(grid) if isinstance(snake.body, RunBody) else deque()
+    taken = []
+    n_runs, pos = get_varint(data, pos)
+    for _ in range(n_runs):
+        start, pos = get_varint(data, pos)
+        word, pos = get_varint(data, pos)
+        dx, dy = DIRECTIONS[word & 3]
+        x, y = start % grid, start // grid
+        for i in range(word >> 2):
+            cell = Point((x + dx * i) % grid, (y + dy * i) % grid)
+            body.append(cell)
+            taken.append(cell.y * grid + cell.x)
+    _set_body(snake, body, taken)
+    count, pos = get_varint(data, pos)
+    n_moved, pos = get_varint(data, pos)
+    size, pos = get_varint(data, pos)
+    raw = zlib.decompress(data[pos:pos + size])
+    pos += size
+    diffs, cells = array("i"), array("i")
+    diffs.frombytes(raw[:4 * n_moved])
+    cells.frombytes(raw[4 * n_moved:])
+    snake.free_cells.restore(count, dict(zip(accumulate(diffs), cells)), taken)
+    _apply_scalars(game, values)
+    words = array("I")
+    words.frombytes(data[pos:pos + 4 * (_MT_WORDS + 1)])
+    pos += 4 * (_MT_WORDS + 1)
+    has_gauss, gauss = struct.unpack_from("<?d", data, pos)
+    pos += struct.calcsize("<?d")
+    game.rng.setstate((3, tuple(words), gauss if has_gauss else None))
+    return values, pos
+
+
+def _set_body(snake, body, taken: list[int]):
+    # Occupancy is cleared where the old body was and set for the new one,
+    # so swapping bodies costs the snakes' lengths, not the board area
+    occupancy = snake.occupancy
+    grid = snake.grid_size
+    for cell in snake.body:
+        occupancy[cell.y * grid + cell.x] = 0
+    for idx in taken:
+        occupancy[idx] += 1
+    snake.body = body
+
+
+def _rng_index(game: Game) -> int:
+    return game.rng.getstate()[1][_MT_WORDS]
+
+
+# ----------------------------
+# Rewind buffer
+# ----------------------------
+class RewindBuffer:
+    """Last ``seconds`` of a game, seekable tick by tick.
+
+    Attaches itself to ``game.on_step``. While scrubbing, ``seek`` moves the
+    game to any recorded tick; ``resume`` then drops the ticks after it
+    (and the inputs that led there) so play continues from that point.
+    """
+
+    def __init__(self, game: Game, seconds: float = REWIND_SECONDS, keyframe_ticks: int = KEYFRAME_TICKS):
+        self.game = game
+        self.capacity = max(1, round(seconds * FPS))  # ticks kept
+        self.keyframe_ticks = keyframe_ticks
+        # Block: first tick, keyframe, one delta per following tick
+        self._firsts: list[int] = []
+        self._keyframes: deque[bytes] = deque()
+        self._deltas: deque[list[bytes]] = deque()
+        self._inputs: deque[array] = deque()  # input-log length after each tick, per block
+        # Last keyframe seeked to, decoded: scrubbing restores it with copies
+        self._decoded: tuple | None = None
+        self.tick = game.snake.moves  # tick the game is showing
+        self._keyframe()
+        game.on_step = self._record
+
+    @property
+    def oldest(self) -> int:
+        return self._firsts[0]
+
+    @property
+    def newest(self) -> int:
+        return self._firsts[-1] + len(self._deltas[-1])
+
+    def nbytes(self) -> int:
+        return sum(len(k) for k in self._keyframes) + sum(len(d) for block in self._deltas for d in block)
+
+    def _keyframe(self):
+        game = self.game
+        self._firsts.append(game.snake.moves)
+        self._keyframes.append(encode_state(game))
+        self._deltas.append([])
+        self._inputs.append(array("i", [len(game.inputs) if game.inputs is not None else 0]))
+        self._scalars = _scalars(game)
+        self._rng = _rng_index(game)
+
+    def _record(self, game: Game):
+        if game.snake.moves == self.tick:
+            return  # the game was already over
+        if self.tick != self.newest:
+            self._truncate()
+        self.tick = game.snake.moves
+        if len(self._deltas[-1]) == self.keyframe_ticks:
+            self._keyframe()
+            self._evict()
+            return
+        scalars = _scalars(game)
+        rng = _rng_index(game)
+        head = game.snake.head
+        out = bytearray()
+        put_varint(out, head.y * game.grid_size + head.x)
+        put_varint(out, (rng - self._rng) % _MT_WORDS)
+        changed = [(i, new - old) for i, (old, new) in enumerate(zip(self._scalars, scalars)) if new != old]
+        put_varint(out, len(changed))
+        for i, diff in changed:
+            put_varint(out, i)
+            put_varint(out, _zigzag(int(diff)))
+        self._deltas[-1].append(bytes(out))
+        self._inputs[-1].append(scalars[_INPUTS])
+        self._scalars = scalars
+        self._rng = rng
+
+    def _evict(self):
+        # Drop whole blocks once the next one alone still covers the capacity
+        while len(self._firsts) > 1 and self._firsts[1] <= self.newest - self.capacity:
+            del self._firsts[0]
+            self._decoded = None
+            self._keyframes.popleft()
+            self._deltas.popleft()
+            self._inputs.popleft()
+
+    def _truncate(self):
+        # Forget everything after the tick on screen
+        b = bisect_right(self._firsts, self.tick) - 1
+        keep = self.tick - self._firsts[b]
+        del self._firsts[b + 1:]
+        if self._decoded is not None and self._decoded[0] > b:
+            self._decoded = None
+        for _ in range(len(self._keyframes) - b - 1):
+            self._keyframes.pop()
+            self._deltas.pop()
+            self._inputs.pop()
+        del self._deltas[-1][keep:]
+        del self._inputs[-1][keep + 1:]
+
+    def seek(self, tick: int) -> int:
+        """Show the game as it was after ``tick`` (clamped to the history)."""
+        tick = max(self.oldest, min(self.newest, tick))
+        game = self.game
+        snake = game.snake
+        b = bisect_right(self._firsts, tick) - 1
+        values = self._load_keyframe(b)
+        words = 0
+        for delta in self._deltas[b][:tick - self._firsts[b]]:
+            head, pos = get_varint(delta, 0)
+            n, pos = get_varint(delta, pos)
+            words += n
+            # Same move as Snake.step: the tail stays while growing
+            snake._push_head(Point(head % game.grid_size, head // game.grid_size))
+            if snake.growth_pending == 0:
+                snake._pop_tail()
+            n, pos = get_varint(delta, pos)
+            for _ in range(n):
+                i, pos = get_varint(delta, pos)
+                diff, pos = get_varint(delta, pos)
+                values[i] += _unzigzag(diff)
+            _apply_scalars(game, values)
+        for _ in range(words):
+            game.rng.getrandbits(32)
+        self.tick = tick
+        self._scalars = values
+        self._rng = _rng_index(game)
+        return tick
+
+    def _load_keyframe(self, b: int) -> list[int]:
+        game = self.game
+        snake = game.snake
+        free = snake.free_cells
+        cached = self._decoded
+        if cached is None or cached[0] != b:
+            values, _ = decode_state(game, self._keyframes[b])
+            body = snake.body
+            grid = game.grid_size
+            cached = self._decoded = (b, list(values), RunBody(grid, body) if isinstance(body, RunBody)
+                                      else deque(body), [c.y * grid + c.x for c in body], free.count,
+                                      dict(free.moved), game.rng.getstate())
+            return values
+        _, values, body, taken, count, moved, rng = cached
+        _set_body(snake, RunBody(body.grid_size, body) if isinstance(body, RunBody) else deque(body), taken)
+        free.restore(count, dict(moved), taken)
+        game.rng.setstate(rng)
+        values = list(values)
+        _apply_scalars(game, values)
+        return values
+
+    def resume(self):
+        """Continue play from the tick on screen."""
+        self._truncate()
+        game = self.game
+        if game.inputs is not None:
+            del game.inputs[self._inputs[-1][-1]:]
+        align_clock(game)
+
+
+# ----------------------------
+# Save / resume
+# ----------------------------
+def encode_game(game: Game, practice: bool = False) -> bytes:
+    flags = (FLAG_SEED if game.seed is not None else 0) | (FLAG_RECORD if game.inputs is not None else 0) \
+        | (FLAG_RUNS if isinstance(game.snake.body, RunBody) else 0) | (FLAG_PRACTICE if practice else 0)
+    out = bytearray(HEADER.pack(MAGIC, VERSION, MODE_SINGLE, game.grid_size, game.seed or 0, flags))
+    state = encode_state(game)
+    put_varint(out, len(state))
+    out += state
+    if game.inputs is not None:
+        encode_inputs(out, game.inputs)
+    return bytes(out)
+
+
+def decode_game(data: bytes, clock: Clock) -> Game:
+    magic, version, mode, grid_size, seed, flags = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION or mode != MODE_SINGLE:
+        raise ValueError("not a saved snake game (or unsupported version)")
+    game = Game(clock=clock, seed=seed if flags & FLAG_SEED else None, grid_size=grid_size,
+                record=bool(flags & FLAG_RECORD), body_runs=bool(flags & FLAG_RUNS))
+    if not flags & FLAG_SEED:
+        game.seed = None  # the game ran on a caller's RNG; no replay
+    size, pos = get_varint(data, HEADER.size)
+    decode_state(game, data, pos)
+    if game.inputs is not None:
+        game.inputs = decode_inputs(data, pos + size)
+    align_clock(game)
+    return game
+
+
+def save_game(path: str, game: Game, practice: bool = False):
+    """Write ``game`` so ``load_game`` can continue it; temp file + rename."""
+    data = encode_game(game, practice)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def save_game_async(path: str, game: Game, practice: bool = False) -> threading.Thread:
+    """``save_game`` from a short-lived thread, so leaving a game never waits.
+
+    The game is encoded on that thread too: it must not be stepped again
+    until the returned thread is done.
+    """
+    def write():
+        try:
+            save_game(path, game, practice)
+        except OSError as e:
+            print(f"could not save the game: {e}")
+
+    saver = threading.Thread(target=write, name="game-saver", daemon=True)
+    saver.start()
+    return saver
+
+
+def load_game(path: str, clock: Clock) -> Game:
+    with open(path, "rb") as f:
+        return decode_game(f.read(), clock)
+
+
+def saved_session(path: str) -> tuple[int, int, bool] | None:
+    """(mode, grid size, practice) of the save at ``path``, or None without a usable one."""
+    try:
+        with open(path, "rb") as f:
+            magic, version, mode, grid_size, _, flags = HEADER.unpack(f.read(HEADER.size))
+    except (OSError, struct.error):
+        return None
+    if magic != MAGIC or version != VERSION:
+        return None
+    return mode, grid_size, bool(flags & FLAG_PRACTICE)
@@ -0,0 +1,199 @@
+"""Leaderboard persistence.
+
+Scores are loaded once into memory and read from there every frame. On the
+desktop every new score is appended to a journal by a background writer
+thread (so the frame loop never waits on disk) and the journal is folded into
+``scores.json`` with a temp-file + rename, both at startup and every so often
+while running. A crash can at worst lose the journal line being written,
+never the snapshot. In the browser (pygbag) the scores live in
+``localStorage``; there are no threads there, so a write is scheduled on the
+running event loop and happens after the frame that added the score, with
+several scores in one frame coalesced into a single write.
+"""
+import asyncio
+import bisect
+import json
+import os
+import queue
+import sys
+import threading
+
+MAX_SCORES = 100  # unique scores kept
+LOCAL_STORAGE_KEY = "snake_scores"
+
+
+def _unique_top(scores, limit: int = MAX_SCORES) -> list[int]:
+    # Deduplicate while preserving highest unique scores only
+    return sorted({int(x) for x in scores}, reverse=True)[:limit]
+
+
+class ScoreStore:
+    def __init__(self, path: str, max_scores: int = MAX_SCORES, compact_every: int = 64):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.max_scores = max_scores
+        self.compact_every = compact_every
+        self.web = "emscripten" in sys.platform
+        # Ascending list of unique scores; the top-K is its tail
+        self._scores: list[int] = []
+        self._queue: queue.Queue = queue.Queue()
+        self._writer: threading.Thread | None = None
+        self._web_pending = False  # localStorage write scheduled, not yet done
+        self._load()
+
+    # ----------------------------
+    # Reads (frame path, memory only)
+    # ----------------------------
+    def top(self, n: int = 15) -> list[int]:
+        return self._scores[::-1][:n]
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def _insert(self, score: int) -> bool:
+        i = bisect.bisect_left(self._scores, score)
+        if i < len(self._scores) and self._scores[i] == score:
+            return False
+        self._scores.insert(i, score)
+        if len(self._scores) > self.max_scores:
+            del self._scores[0]
+        return True
+
+    # ----------------------------
+    # Writes
+    # ----------------------------
+    def add(self, score: int):
+        score = int(score)
+        if not self._insert(score):
+            return
+        if self.web:
+            self._schedule_local_storage()
+            return
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._run_writer, name="score-writer", daemon=True)
+            self._writer.start()
+        self._queue.put(score)
+
+    def flush(self):
+        """Block until every queued score has reached the journal."""
+        if self._writer is not None:
+            self._queue.join()
+
+    def close(self):
+        """Flush, fold the journal into the snapshot and stop the writer."""
+        if self._web_pending:
+            self._write_local_storage()
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+            self._writer = None
+            self._compact(self._scores[::-1])
+
+    # ----------------------------
+    # Storage
+    # ----------------------------
+    def _load(self):
+        if self.web:
+            self._scores = sorted(self._read_local_storage())
+            return
+        scores = self._read_snapshot()
+        journal = self._read_journal()
+        self._scores = sorted(_unique_top(scores + journal, self.max_scores))
+        if journal:
+            # Compact on startup so the journal never grows across sessions
+            self._compact(self._scores[::-1])
+
+    def _read_snapshot(self) -> list[int]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, list):
+                return _unique_top(data, self.max_scores)
+        except FileNotFoundError:
+            return []
+        except Exception:
+            return []
+        return []
+
+    def _read_journal(self) -> list[int]:
+        scores = []
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        scores.append(int(line))
+                    except ValueError:
+                        # Torn final line from a crash mid-append
+                        continue
+        except FileNotFoundError:
+            pass
+        except Exception:
+            pass
+        return scores
+
+    def _compact(self, scores: list[int]):
+        # Atomic snapshot: write a temp file, then rename over the old one
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(scores, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            # The snapshot now holds everything the journal did
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+        except Exception:
+            pass
+
+    def _run_writer(self):
+        pending = 0
+        while True:
+            score = self._queue.get()
+            try:
+                if score is None:
+                    return
+                with open(self.journal_path, "a", encoding="utf-8") as f:
+                    f.write(f"{score}\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                pending += 1
+                if pending >= self.compact_every:
+                    self._compact(_unique_top(self._read_snapshot() + self._read_journal(), self.max_scores))
+                    pending = 0
+            except Exception:
+                pass
+            finally:
+                self._queue.task_done()
+
+    def _read_local_storage(self) -> list[int]:
+        try:
+            import js  # type: ignore
+            data_str = js.window.localStorage.getItem(LOCAL_STORAGE_KEY)
+            if data_str is None:
+                return []
+            data = json.loads(str(data_str))
+            if isinstance(data, list):
+                return _unique_top(data, self.max_scores)
+        except Exception:
+            return []
+        return []
+
+    def _schedule_local_storage(self):
+        if self._web_pending:
+            return
+        self._web_pending = True
+        try:
+            # Runs once the game loop yields, i.e. after this frame
+            asyncio.get_running_loop().call_soon(self._write_local_storage)
+        except RuntimeError:
+            # No event loop (synchronous caller): write through
+            self._write_local_storage()
+
+    def _write_local_storage(self):
+        self._web_pending = False
+        try:
+            import js  # type: ignore
+            js.window.localStorage.setItem(LOCAL_STORAGE_KEY, json.dumps(self._scores[::-1]))
+        except Exception:
+            pass
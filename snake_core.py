@@ -0,0 +1,500 @@
+"""Headless simulation core for the snake game.
+
+Nothing in here imports pygame. Time comes from an injected clock (any
+callable returning milliseconds) and randomness from a per-game
+``random.Random``, so a game can be stepped without a display and as fast as
+the CPU allows. ``main.py`` renders on top of this module.
+"""
+import random
+import time
+from collections import deque
+from typing import Callable, NamedTuple
+
+
+# ----------------------------
+# Simulation configuration
+# ----------------------------
+GRID_SIZE = 32  # 32x32 grid
+FPS = 12  # base tick rate (logic paced separately)
+
+# Weighted fruit types (rarer fruits give more points)
+FRUIT_TYPES = [
+    {"name": "Apple", "color": (235, 64, 52), "points": 1, "weight": 50},
+    {"name": "Orange", "color": (255, 165, 0), "points": 2, "weight": 30},
+    {"name": "Banana", "color": (255, 215, 0), "points": 3, "weight": 15},
+    {"name": "Berry", "color": (186, 85, 211), "points": 4, "weight": 4},
+    {"name": "Starfruit", "color": (30, 144, 255), "points": 5, "weight": 1},
+]
+FRUIT_WEIGHTS = [f["weight"] for f in FRUIT_TYPES]
+
+Clock = Callable[[], int]
+
+# Input log entry kinds: 0-3 index DIRECTIONS, then TURBO and RESYNC (the
+# fixed-timestep catch-up cap dropped a backlog). Value is a delay in ms
+# relative to the last step for the last two.
+DIRECTIONS = [(0, -1), (1, 0), (0, 1), (-1, 0)]  # up, right, down, left
+INPUT_TURBO = 4
+INPUT_RESYNC = 5
+
+
+def monotonic_ms() -> int:
+    return int(time.monotonic() * 1000)
+
+
+class ManualClock:
+    """Clock that only moves when told to; use it to run games headless."""
+
+    def __init__(self, start_ms: int = 0):
+        self.now_ms = start_ms
+
+    def __call__(self) -> int:
+        return self.now_ms
+
+    def advance(self, ms: int) -> int:
+        self.now_ms += ms
+        return self.now_ms
+
+
+class Point(NamedTuple):
+    x: int
+    y: int
+
+
+class FreeCellIndex:
+    """Dense order of the free cell indices plus each cell's position in it.
+
+    Removal swaps the last entry into the hole, so add, remove and a uniform
+    random draw are all O(1) regardless of how full the board is.
+
+    The order starts as the identity and only entries away from it are
+    stored: ``moved`` maps position -> cell and ``where`` cell -> position
+    (-1 when the cell is taken). A new index costs nothing, and its size
+    follows the cells play has touched rather than the board area, which
+    keeps 4096x4096 boards and rewind keyframes cheap.
+    """
+
+    def __init__(self, n_cells: int):
+        self.n_cells = n_cells
+        self.count = n_cells
+        self.moved: dict[int, int] = {}
+        self.where: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, idx: int) -> bool:
+        return self.where.get(idx, idx) >= 0
+
+    def position(self, idx: int) -> int:
+        """Where ``idx`` sits in the order, -1 when taken."""
+        return self.where.get(idx, idx)
+
+    def _place(self, idx: int, pos: int):
+        if idx == pos:
+            self.moved.pop(pos, None)
+            self.where.pop(idx, None)
+        else:
+            self.moved[pos] = idx
+            self.where[idx] = pos
+
+    def add(self, idx: int):
+        self._place(idx, self.count)
+        self.count += 1
+
+    def remove(self, idx: int):
+        hole = self.where.get(idx, idx)
+        self.count -= 1
+        last = self.moved.pop(self.count, self.count)
+        if last != idx:
+            self._place(last, hole)
+        self.where[idx] = -1
+
+    def restore(self, count: int, moved: dict[int, int], taken):
+        """Load a saved order: its size, its moved entries and the taken cells."""
+        self.count = count
+        self.moved = moved
+        self.where = {cell: pos for pos, cell in moved.items()}
+        for idx in taken:
+            self.where[idx] = -1
+
+    def sample(self, rng: random.Random) -> int | None:
+        if not self.count:
+            return None
+        i = rng.randrange(self.count)
+        return self.moved.get(i, i)
+
+
+class RunBody:
+    """Snake body as straight runs instead of one ``Point`` per segment.
+
+    Each run is a list ``[x, y, dx, dy, n]``: the run's tail-most cell, its
+    unit direction (wrap-aware) and its length. Runs are kept tail first, so
+    growing the head extends or opens the last run and retracting the tail
+    shrinks the first one, both O(1). A long snake is usually a handful of
+    runs, whatever its length.
+
+    Supports the deque operations ``Snake`` and its readers use (``append``,
+    ``popleft``, ``len``, iteration and indexing), so either body can back a
+    ``Snake``. Indexing walks runs from the nearer end, which is O(1) for the
+    head and tail cells.
+    """
+
+    def __init__(self, grid_size: int, cells=()):
+        self.grid_size = grid_size
+        self.runs: deque[list[int]] = deque()
+        self._len = 0
+        self._head: Point | None = None  # last cell, read every step
+        for cell in cells:
+            self.append(cell)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self):
+        grid = self.grid_size
+        for x, y, dx, dy, n in self.runs:
+            for i in range(n):
+                yield Point((x + dx * i) % grid, (y + dy * i) % grid)
+
+    def __getitem__(self, i: int) -> Point:
+        if i == -1 and self._len:
+            return self._head
+        if i < 0:
+            i += self._len
+        if not 0 <= i < self._len:
+            raise IndexError("body index out of range")
+        grid = self.grid_size
+        if i < self._len // 2:
+            for x, y, dx, dy, n in self.runs:
+                if i < n:
+                    return Point((x + dx * i) % grid, (y + dy * i) % grid)
+                i -= n
+        else:
+            i = self._len - 1 - i  # from the head
+            for x, y, dx, dy, n in reversed(self.runs):
+                if i < n:
+                    i = n - 1 - i
+                    return Point((x + dx * i) % grid, (y + dy * i) % grid)
+                i -= n
+        raise IndexError("body index out of range")
+
+    def append(self, cell: Point):
+        head, self._head = self._head, cell
+        self._len += 1
+        if self.runs:
+            grid = self.grid_size
+            run = self.runs[-1]
+            sx, sy = (cell.x - head.x + 1) % grid - 1, (cell.y - head.y + 1) % grid - 1
+            if run[4] == 1 and abs(sx) + abs(sy) == 1:
+                # A lone cell takes the direction of whatever follows it
+                run[2], run[3], run[4] = sx, sy, 2
+                return
+            if sx == run[2] and sy == run[3]:
+                run[4] += 1
+                return
+        self.runs.append([cell.x, cell.y, 0, 0, 1])
+
+    def popleft(self) -> Point:
+        if not self.runs:
+            raise IndexError("pop from an empty body")
+        run = self.runs[0]
+        x, y, dx, dy, n = run
+        if n == 1:
+            self.runs.popleft()
+        else:
+            run[0], run[1], run[4] = (x + dx) % self.grid_size, (y + dy) % self.grid_size, n - 1
+        self._len -= 1
+        return Point(x, y)
+
+
+class Snake:
+    def __init__(self, start: Point, grid_size: int = GRID_SIZE, body_runs: bool = False):
+        self.grid_size = grid_size
+        self.direction = Point(1, 0)  # moving right initially
+        self.pending_direction = self.direction
+        # Per-cell segment counts, kept in step with the body so occupancy
+        # and self-collision checks never scan the snake
+        self.occupancy = bytearray(grid_size * grid_size)
+        # Cells with no segment, for O(1) fruit placement
+        self.free_cells = FreeCellIndex(grid_size * grid_size)
+        # Start with length 3 in the center (tail first, head last); very
+        # long snakes can store the body as straight runs instead
+        self.body: deque[Point] | RunBody = RunBody(grid_size) if body_runs else deque()
+        for dx in (-2, -1, 0):
+            self._push_head(Point(start.x + dx, start.y))
+        self.growth_pending: int = 0
+        self.moves: int = 0  # completed steps, lets renderers diff cheaply
+        self.vacated: Point | None = None  # tail cell freed by the last step
+
+    @property
+    def head(self) -> Point:
+        return self.body[-1]
+
+    def __len__(self) -> int:
+        return len(self.body)
+
+    def _push_head(self, cell: Point):
+        self.body.append(cell)
+        idx = cell.y * self.grid_size + cell.x
+        self.occupancy[idx] += 1
+        if self.occupancy[idx] == 1:
+            self.free_cells.remove(idx)
+
+    def _pop_tail(self) -> Point:
+        cell = self.body.popleft()
+        idx = cell.y * self.grid_size + cell.x
+        self.occupancy[idx] -= 1
+        if self.occupancy[idx] == 0:
+            self.free_cells.add(idx)
+        return cell
+
+    def occupies(self, x: int, y: int) -> bool:
+        return self.occupancy[y * self.grid_size + x] > 0
+
+    def set_direction(self, dx: int, dy: int):
+        # Prevent reversing into itself
+        new_dir = Point(dx, dy)
+        if len(self.body) > 1:
+            if new_dir.x == -self.direction.x and new_dir.y == -self.direction.y:
+                return
+        self.pending_direction = new_dir
+
+    def step(self):
+        # Commit direction at the start of tick
+        self.direction = self.pending_direction
+        head = self.body[-1]
+        # Wrap around
+        new_head = Point((head.x + self.direction.x) % self.grid_size,
+                         (head.y + self.direction.y) % self.grid_size)
+
+        self._push_head(new_head)
+        if self.growth_pending > 0:
+            self.growth_pending -= 1
+            self.vacated = None
+        else:
+            self.vacated = self._pop_tail()
+        self.moves += 1
+
+    def hits_self(self) -> bool:
+        # The head cell holds more than one segment
+        head = self.body[-1]
+        return self.occupancy[head.y * self.grid_size + head.x] > 1
+
+
+class Game:
+    def __init__(self, clock: Clock | None = None, rng: random.Random | None = None,
+                 seed: int | None = None, grid_size: int = GRID_SIZE, record: bool = False,
+                 fruit_weights: list[int] | None = None, body_runs: bool = False):
+        # Injected time source and RNG (seeded for reproducible runs)
+        self.clock: Clock = clock if clock is not None else monotonic_ms
+        if rng is None and seed is None:
+            seed = random.getrandbits(64)
+        self.seed = seed  # None when a caller-owned RNG was injected
+        self.rng = rng if rng is not None else random.Random(seed)
+        # (tick, kind, value) for every input; with the seed this replays the game
+        self.inputs: list[tuple[int, int, int]] | None = [] if record else None
+        self.grid_size = grid_size
+        # Per-game copy so balance runs can retune the odds
+        self.fruit_weights = list(fruit_weights) if fruit_weights is not None else FRUIT_WEIGHTS
+        self.score = 0
+        center = Point(self.grid_size // 2, self.grid_size // 2)
+        self.snake = Snake(center, self.grid_size, body_runs)
+        # special fruit (2x2 at center)
+        self.special_active = False
+        self.special_cells: list[Point] = []
+        self.special_points = 10
+        self.special_spawned_at_ms: int | None = None
+        self.special_duration_ms = 5000
+        self.special_spawn_chance = 0.01  # rarer per step
+        self.snake_glow_until_ms: int = 0
+        self.game_over = False
+        self.won = False  # snake filled the whole board
+        # Called before every step to steer (autopilot, bots); None for players
+        self.controller: Callable[["Game"], None] | None = None
+        # Called after every step on the fixed timeline (rewind recording)
+        self.on_step: Callable[["Game"], None] | None = None
+        # initialize first fruit
+        self._roll_new_normal_fruit()
+
+        # timing for movement (fixed timestep, see update)
+        self.base_step_interval_ms = int(1000 / FPS)
+        self.last_step_ms = self.clock()
+        self.max_steps_per_update = 8  # catch-up cap after a long hitch
+
+        # TURBO system
+        self.turbo_active = False
+        self.turbo_duration_ms = 1200
+        self.turbo_cooldown_ms = 12000  # 3x longer cooldown
+        self.turbo_last_used_ms: int = -1000000
+
+    def _random_free_cell(self) -> Point | None:
+        # Uniform draw from the free-cell index; None when the board is full
+        idx = self.snake.free_cells.sample(self.rng)
+        if idx is None:
+            return None
+        return Point(idx % self.grid_size, idx // self.grid_size)
+
+    def _roll_new_normal_fruit(self):
+        choice = self.rng.choices(FRUIT_TYPES, weights=self.fruit_weights, k=1)[0]
+        self.fruit = self._random_free_cell()
+        if self.fruit is None:
+            # Nowhere left to place a fruit: the snake fills the board
+            self.won = True
+            self.game_over = True
+        self.fruit_color = choice["color"]
+        self.fruit_points = choice["points"]
+        self.fruit_name = choice["name"]
+
+    def _maybe_spawn_special(self, now_ms: int):
+        if self.special_active:
+            return
+        # 2x2 centered block
+        cx = self.grid_size // 2 - 1
+        cy = self.grid_size // 2 - 1
+        cells = [
+            Point(cx, cy),
+            Point(cx + 1, cy),
+            Point(cx, cy + 1),
+            Point(cx + 1, cy + 1),
+        ]
+        if any(self.snake.occupies(c.x, c.y) for c in cells):
+            # If snake is occupying center, skip this time
+            return
+        self.special_cells = cells
+        self.special_active = True
+        self.special_spawned_at_ms = now_ms
+
+    def _expire_special(self, now_ms: int):
+        if self.special_active and self.special_spawned_at_ms is not None:
+            if now_ms - self.special_spawned_at_ms >= self.special_duration_ms:
+                self.special_active = False
+                self.special_cells = []
+                self.special_spawned_at_ms = None
+
+    # ----------------------------
+    # TURBO
+    # ----------------------------
+    def _check_turbo_end(self):
+        # Judged on the step timeline (not the frame clock) so replays match
+        if self.turbo_active and (self.last_step_ms - self.turbo_last_used_ms >= self.turbo_duration_ms):
+            self.turbo_active = False
+
+    def turbo_ready(self, now_ms: int) -> bool:
+        self._check_turbo_end()
+        return not self.turbo_active and now_ms - self.turbo_last_used_ms >= self.turbo_cooldown_ms
+
+    def activate_turbo(self, now_ms: int) -> bool:
+        # Activate TURBO if off cooldown
+        if self.game_over or not self.turbo_ready(now_ms):
+            return False
+        self._record(INPUT_TURBO, now_ms - self.last_step_ms)
+        self.turbo_active = True
+        self.turbo_last_used_ms = now_ms
+        return True
+
+    # ----------------------------
+    # Input
+    # ----------------------------
+    def _record(self, kind: int, value: int = 0):
+        if self.inputs is not None:
+            self.inputs.append((self.snake.moves, kind, value))
+
+    def steer(self, dx: int, dy: int):
+        """Player/bot direction input; recorded when the game is recording."""
+        if self.game_over:
+            return
+        self._record(DIRECTIONS.index((dx, dy)))
+        self.snake.set_direction(dx, dy)
+
+    def step_interval_ms(self) -> int:
+        speed_multiplier = 0.45 if self.turbo_active else 1.0
+        return int(self.base_step_interval_ms * speed_multiplier)
+
+    # ----------------------------
+    # Simulation
+    # ----------------------------
+    def update(self, now_ms: int) -> int:
+        """Run every logic step that has come due by ``now_ms``.
+
+        Steps are scheduled on a fixed timeline (each one exactly one interval
+        after the previous), independent of how often this is called, so TURBO
+        really moves 1/0.45x faster and a slow frame is caught up instead of
+        dropped. Returns the number of steps taken.
+        """
+        steps = 0
+        while not self.game_over:
+            # Handle turbo end (as of the step being scheduled)
+            self._check_turbo_end()
+            if now_ms - self.last_step_ms < self.step_interval_ms():
+                break
+            if steps == self.max_steps_per_update:
+                # Too far behind (window drag, breakpoint): drop the backlog
+                # rather than spiral trying to catch up
+                self._record(INPUT_RESYNC, now_ms - self.last_step_ms)
+                self.last_step_ms = now_ms
+                break
+            self.advance()
+            steps += 1
+        # The special fruit expires on steps only: a TURBO activation can
+        # schedule the next step before this frame's time, so expiring here
+        # would make the outcome depend on the frame rate
+        return steps
+
+    def advance(self):
+        """Take the next step on the fixed timeline, whatever the clock says."""
+        self._check_turbo_end()
+        self.last_step_ms += self.step_interval_ms()
+        self.step(self.last_step_ms)
+        if self.on_step is not None:
+            self.on_step(self)
+
+    def step_progress(self, now_ms: int) -> float:
+        """Fraction of the current step interval elapsed, for interpolation."""
+        return min(1.0, max(0.0, (now_ms - self.last_step_ms) / self.step_interval_ms()))
+
+    def step(self, now_ms: int | None = None):
+        """Advance the game by exactly one logic step, ignoring pacing."""
+        if self.game_over:
+            return
+        if now_ms is None:
+            now_ms = self.clock()
+        if self.controller is not None:
+            self.controller(self)
+
+        # Move snake
+        self.snake.step()
+
+        # Self collision
+        if self.snake.hits_self():
+            self.game_over = True
+            return
+
+        head = self.snake.head
+
+        # Expire special fruit after duration (before the spawn roll, so the
+        # RNG is drawn the same whether or not a frame already expired it)
+        self._expire_special(now_ms)
+
+        # Maybe spawn special fruit at any time (only evaluate on steps)
+        if not self.special_active and self.rng.random() < self.special_spawn_chance:
+            self._maybe_spawn_special(now_ms)
+
+        # Check special fruit first
+        if self.special_active:
+            if head in self.special_cells:
+                self.score += self.special_points
+                self.snake.growth_pending += self.special_points
+                self.special_active = False
+                self.special_cells = []
+                # Snake glow for 2s after eating special
+                self.snake_glow_until_ms = now_ms + 2000
+                # After special, roll a new normal fruit
+                self._roll_new_normal_fruit()
+                return
+
+        # Check normal fruit
+        if self.fruit is not None and head == self.fruit:
+            self.score += self.fruit_points
+            self.snake.growth_pending += self.fruit_points
+            # Roll next normal fruit
+            self._roll_new_normal_fruit()
@@ -0,0 +1,328 @@
+"""Headless tournaments for balance studies.
+
+Runs many seeded games with a bot policy and no display, spread over a
+process pool. Each worker is started once with the run configuration and
+then plays whole batches of seeds, sending one list of result rows back per
+batch rather than one message per game. The parent streams rows to a CSV
+file as batches arrive and prints score/length/duration distributions at the
+end::
+
+    python tournament.py --games 100000 --policy greedy --out results.csv
+    python tournament.py --games 2000 --policy autopilot --set special_spawn_chance=0.02 \\
+        --weights 40,30,20,8,2 --summary summary.json
+
+Any numeric ``Game`` attribute (``special_spawn_chance``,
+``special_duration_ms``, ``turbo_cooldown_ms``, ...) can be overridden with
+``--set``; ``--weights`` replaces the fruit weights.
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from multiprocessing import Pool
+
+from autopilot import Autopilot
+from snake_core import FRUIT_TYPES, GRID_SIZE, Game, ManualClock
+
+POLICIES = ("greedy", "autopilot", "random")
+FRUIT_NAMES = [f["name"] for f in FRUIT_TYPES] + ["Mega"]
+COLUMNS = ["seed", "score", "length", "steps", "duration_ms", "won"] + FRUIT_NAMES
+
+
+@dataclass
+class Config:
+    grid_size: int = GRID_SIZE
+    policy: str = "greedy"
+    max_steps: int = 5000
+    turbo: bool = False  # bots hit TURBO whenever the Mega Fruit is up
+    overrides: dict[str, float] = field(default_factory=dict)
+    fruit_weights: list[int] | None = None
+
+
+# ----------------------------
+# Policies
+# ----------------------------
+def greedy(game: Game):
+    """Step towards the target, never straight into the body. O(1) per step."""
+    snake = game.snake
+    grid = game.grid_size
+    head = snake.head
+    if game.special_active:
+        goal = game.special_cells[0]
+    elif game.fruit is not None:
+        goal = game.fruit
+    else:
+        return
+    d = snake.direction
+    best = None
+    best_dist = grid * 2 + 1
+    # Straight first so ties keep the current heading
+    for dx, dy in ((d.x, d.y), (d.y, -d.x), (-d.y, d.x)):
+        x = (head.x + dx) % grid
+        y = (head.y + dy) % grid
+        if snake.occupancy[y * grid + x]:
+            continue
+        ddx = abs(x - goal.x)
+        ddy = abs(y - goal.y)
+        dist = min(ddx, grid - ddx) + min(ddy, grid - ddy)
+        if dist < best_dist:
+            best, best_dist = (dx, dy), dist
+    if best is not None and best != d:
+        game.steer(*best)
+
+
+class RandomWalk:
+    """Uniformly random safe turn; a floor for the other policies."""
+
+    def __init__(self, seed: int):
+        # Own RNG so the game's draws stay those of the seed
+        self.rng = random.Random(seed)
+
+    def __call__(self, game: Game):
+        snake = game.snake
+        grid = game.grid_size
+        head = snake.head
+        d = snake.direction
+        options = []
+        for dx, dy in ((d.x, d.y), (d.y, -d.x), (-d.y, d.x)):
+            if not snake.occupancy[((head.y + dy) % grid) * grid + (head.x + dx) % grid]:
+                options.append((dx, dy))
+        if options:
+            choice = self.rng.choice(options)
+            if choice != d:
+                game.steer(*choice)
+
+
+def make_policy(name: str, game: Game, seed: int):
+    if name == "greedy":
+        return greedy
+    if name == "autopilot":
+        return Autopilot(game.grid_size)
+    if name == "random":
+        return RandomWalk(seed)
+    raise ValueError(f"unknown policy {name!r}")
+
+
+# ----------------------------
+# Games
+# ----------------------------
+def play(config: Config, seed: int) -> list:
+    """Play one game to the end (or ``max_steps``) and return its CSV row."""
+    game = Game(clock=ManualClock(0), seed=seed, grid_size=config.grid_size, fruit_weights=config.fruit_weights)
+    for name, value in config.overrides.items():
+        setattr(game, name, value)
+    game.controller = make_policy(config.policy, game, seed)
+    eaten = [0] * len(FRUIT_NAMES)
+    mega = len(FRUIT_NAMES) - 1
+    index = {name: i for i, name in enumerate(FRUIT_NAMES)}
+    snake = game.snake
+    while not game.game_over and snake.moves < config.max_steps:
+        if config.turbo and game.special_active and game.turbo_ready(game.last_step_ms):
+            game.activate_turbo(game.last_step_ms)
+        score = game.score
+        cells = game.special_cells if game.special_active else []
+        spawned_at = game.special_spawned_at_ms
+        fruit_name = game.fruit_name
+        game.advance()
+        # The Mega Fruit went away under the head before its time ran out:
+        # eaten, whatever its points (--set can make them match a fruit's)
+        if (cells and not game.special_active and snake.head in cells
+                and game.last_step_ms - spawned_at < game.special_duration_ms):
+            eaten[mega] += 1
+        elif game.score != score:
+            eaten[index[fruit_name]] += 1
+    return [seed, game.score, len(snake), snake.moves, game.last_step_ms, int(game.won)] + eaten
+
+
+_config: Config | None = None
+
+
+def _init_worker(config: Config):
+    # Runs once per worker process; every batch after that reuses it
+    global _config
+    _config = config
+
+
+def _run_batch(task: tuple[int, int]) -> list[list]:
+    first, count = task
+    return [play(_config, seed) for seed in range(first, first + count)]
+
+
+# ----------------------------
+# Aggregation
+# ----------------------------
+def _percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q / 100.0 * len(sorted_values)))]
+
+
+def _distribution(values: list[float]) -> dict[str, float]:
+    values = sorted(values)
+    return {
+        "mean": statistics.fmean(values) if values else 0.0,
+        "stdev": statistics.pstdev(values) if values else 0.0,
+        "min": values[0] if values else 0.0,
+        "p10": _percentile(values, 10),
+        "p50": _percentile(values, 50),
+        "p90": _percentile(values, 90),
+        "p99": _percentile(values, 99),
+        "max": values[-1] if values else 0.0,
+    }
+
+
+class Summary:
+    def __init__(self, config: Config):
+        self.config = config
+        self.scores: list[int] = []
+        self.lengths: list[int] = []
+        self.steps: list[int] = []
+        self.durations: list[float] = []
+        self.wins = 0
+        self.capped = 0  # stopped by max_steps while still alive
+        self.eaten = [0] * len(FRUIT_NAMES)
+
+    def add(self, row: list):
+        _, score, length, steps, duration_ms, won = row[:6]
+        self.scores.append(score)
+        self.lengths.append(length)
+        self.steps.append(steps)
+        self.durations.append(duration_ms / 1000.0)
+        self.wins += won
+        self.capped += steps >= self.config.max_steps
+        for i, n in enumerate(row[6:]):
+            self.eaten[i] += n
+
+    def to_dict(self) -> dict:
+        n = len(self.scores)
+        return {
+            "games": n,
+            "policy": self.config.policy,
+            "grid_size": self.config.grid_size,
+            "max_steps": self.config.max_steps,
+            "overrides": self.config.overrides,
+            "fruit_weights": self.config.fruit_weights,
+            "win_rate": self.wins / n if n else 0.0,
+            "capped_rate": self.capped / n if n else 0.0,
+            "score": _distribution(self.scores),
+            "length": _distribution(self.lengths),
+            "steps": _distribution(self.steps),
+            "duration_s": _distribution(self.durations),
+            "eaten_per_game": {name: (c / n if n else 0.0) for name, c in zip(FRUIT_NAMES, self.eaten)},
+        }
+
+    def print(self, elapsed: float):
+        d = self.to_dict()
+        n = d["games"]
+        rate = n / elapsed if elapsed > 0 else float("inf")
+        print(f"{n} games in {elapsed:.1f}s ({rate:.0f} games/s), policy {d['policy']}, grid {d['grid_size']}")
+        print(f"won {d['win_rate']:.1%}  hit max steps {d['capped_rate']:.1%}")
+        print(f"{'':<12}{'mean':>9}{'stdev':>9}{'p10':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}")
+        for key in ("score", "length", "steps", "duration_s"):
+            s = d[key]
+            print(f"{key:<12}" + "".join(f"{s[k]:9.1f}" for k in ("mean", "stdev", "p10", "p50", "p90", "p99", "max")))
+        print("eaten/game  " + "  ".join(f"{k} {v:.2f}" for k, v in d["eaten_per_game"].items()))
+        self._print_histogram()
+
+    def _print_histogram(self, bins: int = 10, width: int = 40):
+        if not self.scores:
+            return
+        lo, hi = min(self.scores), max(self.scores)
+        step = max(1, math.ceil((hi - lo + 1) / bins))
+        counts = [0] * bins
+        for s in self.scores:
+            counts[min(bins - 1, (s - lo) // step)] += 1
+        top = max(counts)
+        for i, c in enumerate(counts):
+            start = lo + i * step
+            if start > hi:
+                break
+            bar = "#" * max(1 if c else 0, round(c / top * width))
+            print(f"score {start:>6}-{start + step - 1:<6} {c:>8} {bar}")
+
+
+# ----------------------------
+# CLI
+# ----------------------------
+def _parse_set(items: list[str]) -> dict[str, float]:
+    probe = Game(clock=ManualClock(0), seed=0)
+    overrides = {}
+    for item in items:
+        name, _, value = item.partition("=")
+        current = getattr(probe, name, None)
+        if name.startswith("_") or isinstance(current, bool) or not isinstance(current, (int, float)):
+            raise SystemExit(f"--set: {name!r} is not a numeric Game setting")
+        overrides[name] = type(current)(float(value)) if isinstance(current, int) else float(value)
+    return overrides
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Run headless snake tournaments")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--batch", type=int, default=0, help="games per worker task (default: auto)")
+    parser.add_argument("--policy", choices=POLICIES, default="greedy")
+    parser.add_argument("--grid", type=int, default=GRID_SIZE)
+    parser.add_argument("--max-steps", type=int, default=5000, help="stop a game after this many steps")
+    parser.add_argument("--seed", type=int, default=0, help="first seed; games use seed, seed+1, ...")
+    parser.add_argument("--turbo", action="store_true", help="bots use TURBO while the Mega Fruit is up")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE", help="override a Game setting")
+    parser.add_argument("--weights", default=None, help="fruit weights, comma separated, in FRUIT_TYPES order")
+    parser.add_argument("--out", default=None, help="per-game results CSV")
+    parser.add_argument("--summary", default=None, help="write the aggregate as JSON here")
+    args = parser.parse_args(argv)
+
+    weights = None
+    if args.weights:
+        weights = [int(w) for w in args.weights.split(",")]
+        if len(weights) != len(FRUIT_TYPES):
+            raise SystemExit(f"--weights needs {len(FRUIT_TYPES)} values")
+    config = Config(args.grid, args.policy, args.max_steps, args.turbo, _parse_set(args.set), weights)
+    # A few batches per worker keeps them all busy to the end without
+    # flooding the parent with messages
+    batch = args.batch or max(1, min(1000, args.games // (args.jobs * 8) or 1))
+    tasks = [(args.seed + i, min(batch, args.games - i)) for i in range(0, args.games, batch)]
+
+    summary = Summary(config)
+    out = open(args.out, "w", encoding="utf-8", newline="") if args.out else None
+    writer = csv.writer(out) if out else None
+    if writer:
+        writer.writerow(COLUMNS)
+    start = time.perf_counter()
+    try:
+        if args.jobs > 1:
+            with Pool(args.jobs, initializer=_init_worker, initargs=(config,)) as pool:
+                batches = pool.imap_unordered(_run_batch, tasks)
+                for rows in batches:
+                    _collect(rows, summary, writer)
+        else:
+            _init_worker(config)
+            for task in tasks:
+                _collect(_run_batch(task), summary, writer)
+    finally:
+        if out:
+            out.close()
+    elapsed = time.perf_counter() - start
+
+    summary.print(elapsed)
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump(summary.to_dict(), f, indent=2)
+    return 0
+
+
+def _collect(rows: list[list], summary: Summary, writer):
+    for row in rows:
+        summary.add(row)
+    if writer:
+        writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,390 @@
+"""Batched snake environment for agent training (needs numpy).
+
+Steps thousands of independent games at once with the rules of
+``snake_core.Game``:
+- wrap-around moves, and no reversing into yourself;
+- the snake dies on self collision;
+- weighted fruits grow the snake by their points;
+- the 2x2 Mega Fruit spawns at the centre with a 1% chance per step, lasts
+  5 s and is worth 10;
+- the game is won when the board is full.
+
+TURBO only changes the pacing, so games run at the base step interval
+(the Mega Fruit lasts 61 steps). All state lives in a few arrays indexed by
+game. There are no per-game Python objects, and a step is a fixed number of
+numpy operations whatever the batch size.
+
+The observation is ``board``, an (n, grid, grid) uint8 view of the
+simulation's own cell array (``EMPTY``/``BODY``/``HEAD``/``FRUIT``/``MEGA``).
+It is updated in place and never copied. Finished games restart
+automatically. ``final_score`` holds their score for the step they ended.
+
+Randomness comes from a numpy generator. A seeded batch is reproducible,
+but does not replay the same games as a seeded ``Game``. ``check`` runs one
+env next to a ``Game`` that is fed the env's random draws and compares them
+after every step, so the two can't drift apart unnoticed::
+
+    python vecenv.py check --steps 50000
+"""
+import argparse
+import sys
+
+import numpy as np
+
+from snake_core import DIRECTIONS, FPS, FRUIT_TYPES, FRUIT_WEIGHTS, GRID_SIZE, Game, ManualClock
+
+EMPTY, BODY, HEAD, FRUIT, MEGA = range(5)
+
+# Game defaults, in steps of the base interval
+STEP_MS = int(1000 / FPS)
+SPECIAL_MS = 5000
+SPECIAL_POINTS = 10
+SPECIAL_CHANCE = 0.01
+START_LENGTH = 3
+PLACE_TRIES = 4  # random probes for a free fruit cell before an exact pick
+
+
+class VecSnakeEnv:
+    def __init__(self, n_envs: int, grid_size: int = GRID_SIZE, seed: int | None = None,
+                 fruit_weights: list[int] | None = None, max_steps: int | None = None,
+                 special_chance: float = SPECIAL_CHANCE):
+        self.n = n_envs
+        self.grid_size = g = grid_size
+        self.n_cells = c = grid_size * grid_size
+        self.max_steps = max_steps  # end (and restart) games that run this long
+        self.special_chance = special_chance
+        self.rng = np.random.default_rng(seed)
+        weights = np.asarray(fruit_weights if fruit_weights is not None else FRUIT_WEIGHTS, dtype=np.float64)
+        self._fruit_cdf = np.cumsum(weights) / weights.sum()
+        self._fruit_pts = np.array([f["points"] for f in FRUIT_TYPES], dtype=np.int32)
+        self._dx = np.array([d[0] for d in DIRECTIONS], dtype=np.int32)
+        self._dy = np.array([d[1] for d in DIRECTIONS], dtype=np.int32)
+        cx = cy = g // 2 - 1
+        self._mega = np.array([cy * g + cx, cy * g + cx + 1, (cy + 1) * g + cx, (cy + 1) * g + cx + 1])
+        self._is_mega = np.zeros(c, dtype=bool)
+        self._is_mega[self._mega] = True
+        self._rows = np.arange(n_envs)
+
+        # Simulation state, one entry (or row) per game
+        self._cells = np.zeros((n_envs, c), dtype=np.uint8)
+        self.board = self._cells.reshape(n_envs, g, g)
+        self.body = np.zeros((n_envs, c), dtype=np.int32)  # ring of cell indices, tail..head
+        self.head_at = np.zeros(n_envs, dtype=np.int32)  # ring slot of the head
+        self.tail_at = np.zeros(n_envs, dtype=np.int32)
+        self.length = np.zeros(n_envs, dtype=np.int32)
+        self.head_x = np.zeros(n_envs, dtype=np.int32)
+        self.head_y = np.zeros(n_envs, dtype=np.int32)
+        self.direction = np.zeros(n_envs, dtype=np.int8)  # index into DIRECTIONS
+        self.growth = np.zeros(n_envs, dtype=np.int32)
+        self.fruit = np.zeros(n_envs, dtype=np.int32)  # cell index, -1 when the board is full
+        self.fruit_points = np.zeros(n_envs, dtype=np.int32)
+        self.special = np.zeros(n_envs, dtype=bool)
+        self.special_at = np.zeros(n_envs, dtype=np.int64)
+        self.now_ms = np.zeros(n_envs, dtype=np.int64)
+        self.steps = np.zeros(n_envs, dtype=np.int64)
+        self.score = np.zeros(n_envs, dtype=np.int32)
+        self.won = np.zeros(n_envs, dtype=bool)
+        self.final_score = np.zeros(n_envs, dtype=np.int32)
+        self.reset()
+
+    # ----------------------------
+    # Episodes
+    # ----------------------------
+    def reset(self) -> np.ndarray:
+        self._reset(self._rows)
+        return self.board
+
+    def _reset(self, idx: np.ndarray):
+        g = self.grid_size
+        self._cells[idx] = EMPTY
+        # Length 3 at the centre heading right, tail first (as Snake)
+        y = g // 2
+        start = y * g + (g // 2 + np.arange(-2, 1)) % g
+        self._cells[idx[:, None], start[:-1]] = BODY
+        self._cells[idx, start[-1]] = HEAD
+        self.body[idx, :START_LENGTH] = start
+        self.tail_at[idx] = 0
+        self.head_at[idx] = START_LENGTH - 1
+        self.length[idx] = START_LENGTH
+        self.head_x[idx] = start[-1] % g
+        self.head_y[idx] = y
+        self.direction[idx] = 1
+        self.growth[idx] = 0
+        self.special[idx] = False
+        self.now_ms[idx] = 0
+        self.steps[idx] = 0
+        self.score[idx] = 0
+        self.won[idx] = False
+        self._roll_fruit(idx)
+
+    # ----------------------------
+    # Fruit
+    # ----------------------------
+    def _roll_fruit(self, idx: np.ndarray):
+        """New weighted fruit on a uniform snake-free cell for games ``idx``."""
+        if not len(idx):
+            return
+        kinds = np.searchsorted(self._fruit_cdf, self.rng.random(len(idx)), side="right")
+        self.fruit_points[idx] = self._fruit_pts[np.minimum(kinds, len(self._fruit_pts) - 1)]
+        cells = np.full(len(idx), -1, dtype=np.int32)
+        todo = np.arange(len(idx))
+        # Random probes are cheap while the board is mostly free...
+        for _ in range(PLACE_TRIES):
+            probe = self.rng.integers(0, self.n_cells, len(todo))
+            code = self._cells[idx[todo], probe]
+            ok = (code != BODY) & (code != HEAD)
+            cells[todo[ok]] = probe[ok]
+            todo = todo[~ok]
+            if not len(todo):
+                break
+        if len(todo):
+            # ...crowded boards pick the k-th free cell exactly
+            rows = idx[todo]
+            free = (self._cells[rows] != BODY) & (self._cells[rows] != HEAD)
+            n_free = free.sum(axis=1)
+            k = (self.rng.random(len(rows)) * n_free).astype(np.int64)
+            pick = np.argmax(np.cumsum(free, axis=1) > k[:, None], axis=1)
+            full = n_free == 0
+            cells[todo] = np.where(full, -1, pick)
+            # Nowhere left to place a fruit: the snake fills the board
+            self.won[rows[full]] = True
+        self.fruit[idx] = cells
+        placed = cells >= 0
+        rows, cells = idx[placed], cells[placed]
+        # Under an active Mega Fruit the fruit shows once it is gone
+        shown = self._cells[rows, cells] == EMPTY
+        self._cells[rows[shown], cells[shown]] = FRUIT
+
+    def _clear_mega(self, idx: np.ndarray):
+        if not len(idx):
+            return
+        sub = self._cells[idx[:, None], self._mega]
+        sub[sub == MEGA] = EMPTY
+        self._cells[idx[:, None], self._mega] = sub
+        # A fruit that was hidden underneath shows again (unless just eaten)
+        fruit = self.fruit[idx]
+        hidden = (fruit >= 0) & self._is_mega[np.maximum(fruit, 0)]
+        rows, fruit = idx[hidden], fruit[hidden]
+        shown = self._cells[rows, fruit] == EMPTY
+        self._cells[rows[shown], fruit[shown]] = FRUIT
+
+    # ----------------------------
+    # Step
+    # ----------------------------
+    def step(self, actions: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """One step of every game; ``actions`` index DIRECTIONS (-1 keeps going).
+
+        Returns the board view, each game's points this step and which games
+        ended (they have already restarted; see ``final_score``).
+        """
+        rows = self._rows
+        cells = self._cells
+        c = self.n_cells
+        g = self.grid_size
+        actions = np.asarray(actions)
+
+        # Steering, never straight back (DIRECTIONS are clockwise)
+        turn = (actions >= 0) & (actions != (self.direction + 2) % 4)
+        self.direction = np.where(turn, actions, self.direction).astype(np.int8)
+        self.head_x = (self.head_x + self._dx[self.direction]) % g
+        self.head_y = (self.head_y + self._dy[self.direction]) % g
+        head = self.head_y * g + self.head_x
+
+        # The tail moves out before the head moves in, unless growing
+        cells[rows, self.body[rows, self.head_at]] = BODY
+        growing = self.growth > 0
+        self.growth -= growing
+        moving = ~growing
+        tail = self.body[rows, self.tail_at]
+        cells[rows[moving], tail[moving]] = EMPTY
+        self.tail_at = np.where(moving, (self.tail_at + 1) % c, self.tail_at)
+        self.length += growing
+        dead = cells[rows, head] == BODY
+        self.head_at = (self.head_at + 1) % c
+        self.body[rows, self.head_at] = head
+        ate_fruit = head == self.fruit
+        cells[rows, head] = HEAD
+
+        self.now_ms += STEP_MS
+        self.steps += 1
+        alive = ~dead
+
+        # Mega Fruit: expire, then maybe spawn (same order as Game.step)
+        expired = alive & self.special & (self.now_ms - self.special_at >= SPECIAL_MS)
+        self.special &= ~expired
+        self._clear_mega(np.flatnonzero(expired))
+        roll = alive & ~self.special
+        spawn = roll & (self.rng.random(self.n) < self.special_chance)
+        if spawn.any():
+            idx = np.flatnonzero(spawn)
+            centre = cells[idx[:, None], self._mega]
+            idx = idx[~((centre == BODY) | (centre == HEAD)).any(axis=1)]
+            self.special[idx] = True
+            self.special_at[idx] = self.now_ms[idx]
+            cells[idx[:, None], self._mega] = MEGA
+
+        reward = np.zeros(self.n, dtype=np.int32)
+        ate_mega = alive & self.special & self._is_mega[head]
+        if ate_mega.any():
+            idx = np.flatnonzero(ate_mega)
+            reward[idx] = SPECIAL_POINTS
+            self.special[idx] = False
+            self._clear_mega(idx)
+            # The normal fruit is rolled again too
+            fruit = self.fruit[idx]
+            stale = (fruit >= 0) & (cells[idx, np.maximum(fruit, 0)] == FRUIT)
+            cells[idx[stale], fruit[stale]] = EMPTY
+            self._roll_fruit(idx)
+        ate_fruit &= alive & ~ate_mega
+        if ate_fruit.any():
+            idx = np.flatnonzero(ate_fruit)
+            reward[idx] = self.fruit_points[idx]
+            self._roll_fruit(idx)
+        self.score += reward
+        self.growth += reward
+
+        done = dead | self.won
+        if self.max_steps is not None:
+            done |= self.steps >= self.max_steps
+        if done.any():
+            idx = np.flatnonzero(done)
+            self.final_score[idx] = self.score[idx]
+            self._reset(idx)
+        return self.board, reward, done
+
+
+# ----------------------------
+# Lockstep check against Game
+# ----------------------------
+class _MirrorRandom:
+    """Answers ``Game``'s draws with what the env drew for game 0 this step."""
+
+    def __init__(self, env: VecSnakeEnv):
+        self.env = env
+        self.game: Game | None = None
+        self.spawned = False  # the env spawned a Mega Fruit this step
+
+    def random(self) -> float:
+        # Only the Mega roll; the game's chance sits between the two answers
+        return 0.0 if self.spawned else 0.5
+
+    def choices(self, population, weights=None, k=1):
+        points = int(self.env.fruit_points[0])
+        return [next(f for f in population if f["points"] == points)]
+
+    def randrange(self, n: int) -> int:
+        # The env's fruit cell, as a position in the game's free-cell index
+        return self.game.snake.free_cells.position(int(self.env.fruit[0]))
+
+
+def _mirror_game(env: VecSnakeEnv, mirror: _MirrorRandom) -> Game:
+    # The mirror needs the game before __init__ rolls the first fruit
+    game = Game.__new__(Game)
+    mirror.game = game
+    Game.__init__(game, clock=ManualClock(0), rng=mirror, grid_size=env.grid_size)
+    game.special_spawn_chance = 0.25
+    return game
+
+
+def _mismatch(env: VecSnakeEnv, game: Game) -> str | None:
+    g = env.grid_size
+    board = env.board[0]
+    snake = game.snake
+    on_snake = np.zeros((g, g), dtype=bool)
+    for p in snake.body:
+        on_snake[p.y, p.x] = True
+    head = snake.head
+    if not (((board == BODY) | (board == HEAD)) == on_snake).all() or env.length[0] != len(snake.body):
+        return "snake body"
+    if board[head.y, head.x] != HEAD:
+        return "head"
+    if env.score[0] != game.score:
+        return f"score {env.score[0]} != {game.score}"
+    if env.growth[0] != snake.growth_pending:
+        return f"growth {env.growth[0]} != {snake.growth_pending}"
+    if env.special[0] != game.special_active:
+        return f"Mega Fruit active {bool(env.special[0])} != {game.special_active}"
+    fruit = game.fruit
+    if env.fruit[0] != fruit.y * g + fruit.x or env.fruit_points[0] != game.fruit_points:
+        return "fruit"
+    if game.special_active:
+        if any(board[c.y, c.x] != MEGA for c in game.special_cells if c != head):
+            return "Mega Fruit cells"
+        # A fruit rolled under the Mega Fruit stays hidden until it goes
+        if board[fruit.y, fruit.x] not in (FRUIT, MEGA, HEAD):
+            return "fruit under the Mega Fruit"
+    elif board[fruit.y, fruit.x] != FRUIT or (board == MEGA).any():
+        return "fruit cell"
+    if (board == FRUIT).sum() > 1:
+        return "more than one fruit shown"
+    return None
+
+
+def _cycle_action(x: int, y: int, g: int) -> int:
+    # Serpentine over columns 1.., back up column 0: a Hamiltonian cycle on an
+    # even board that the starting snake already lies on, so following it wins
+    if x == 0:
+        return 1 if y == 0 else 0
+    if y % 2 == 0:
+        return 1 if x < g - 1 else 2
+    if x > 1:
+        return 3
+    return 3 if y == g - 1 else 2
+
+
+def lockstep(grid_size: int, steps: int, seed: int = 0, special_chance: float = 0.05) -> tuple[int, int, str | None]:
+    """Step one env and a mirrored ``Game`` together; (games, wins, first mismatch)."""
+    env = VecSnakeEnv(1, grid_size=grid_size, seed=seed, special_chance=special_chance)
+    mirror = _MirrorRandom(env)
+    game = _mirror_game(env, mirror)
+    policy = np.random.default_rng(seed + 1)
+    games = wins = 0
+    for t in range(steps):
+        if games % 2 and grid_size % 2 == 0:
+            # Every other game fills the board, to check the win
+            action = _cycle_action(int(env.head_x[0]), int(env.head_y[0]), grid_size)
+        else:
+            action = int(policy.integers(0, 4)) if policy.random() < 0.3 else -1
+        _, _, done = env.step(np.array([action]))
+        if action >= 0:
+            game.snake.set_direction(*DIRECTIONS[action])
+        mirror.spawned = bool(env.special[0]) and env.special_at[0] == env.now_ms[0] and not done[0]
+        game.clock.advance(game.step_interval_ms())
+        game.update(game.clock())
+        if game.game_over != bool(done[0]):
+            return games, wins, f"step {t}: game over {game.game_over}, env done {bool(done[0])}"
+        if done[0]:
+            if env.final_score[0] != game.score:
+                return games, wins, f"step {t}: final score {env.final_score[0]} != {game.score}"
+            games += 1
+            wins += game.won
+            # The env has already restarted; the new game reads its fresh fruit
+            game = _mirror_game(env, mirror)
+        error = _mismatch(env, game)
+        if error is not None:
+            return games, wins, f"step {t}: {error}"
+    return games, wins, None
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Batched snake environment tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    check = sub.add_parser("check", help="step the env in lockstep with snake_core.Game")
+    check.add_argument("--grids", type=int, nargs="+", default=[4, 8, 12, GRID_SIZE])
+    check.add_argument("--steps", type=int, default=20000, help="steps per grid size")
+    check.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for grid in args.grids:
+        games, wins, error = lockstep(grid, args.steps, args.seed + grid)
+        if error is not None:
+            failed += 1
+            print(f"MISMATCH grid {grid}: {error}")
+        else:
+            print(f"ok       grid {grid}: {args.steps} steps, {games} games, {wins} won")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())